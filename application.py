@@ -25,10 +25,26 @@ import pickle
 import pathlib
 from random import choice
 from sys import exit
-from time import sleep
+from time import perf_counter, sleep
 
 from rules import *
 from visualization import *
+from engine import *
+from book import *
+
+
+
+##### CONSTANTS #####
+
+"""
+The constant 'CPU_MOVE_TIME' is the time, in seconds, of the engine's search 
+of each CPU move. 'TURN_PAUSE' is the pause, in seconds, after each turn so the 
+players can read its messages; the time the CPU took to move is part of it.
+
+"""
+
+CPU_MOVE_TIME = 1.0
+TURN_PAUSE = 2
 
 
 
@@ -39,7 +55,7 @@ from visualization import *
 def setting_classic():
     """Set the starting position in classic chess modality."""
     global pieces, game_start_setting
-    pieces = []
+    pieces = Board()
     
     create("R", "w", "a1", pieces)
     create("N", "w", "b1", pieces)
@@ -150,7 +166,7 @@ def fischer_draw():
 def setting_fischer():
     """Set the starting position in fischer chess modality."""
     global pieces, game_start_setting
-    pieces = []
+    pieces = Board()
     
     setting = fischer_draw()
     for piece, column in zip(setting, COLS):
@@ -363,6 +379,7 @@ def player_turn(color, notation, setting=False):
     
     if chess_move.upper() == "OPTIONS":
         print("You have selected the Options command.", end= "\n\n")
+        cpu_engine.stop_ponder()
         sleep(3)
         execute_in_game_options(setting=setting)
 
@@ -407,13 +424,97 @@ def player_turn(color, notation, setting=False):
         print("Invalid input syntax. Please, try again.", end= "\n\n")
 
 
-def cpu_turn(color, notation):
-    """Reproduce the sequence of the CPU turn for a color."""
+def get_game_history(position, positions):
+    """Return the Zobrist keys of the previous positions of a position in the game, and set its halfmove counter.
+    
+    The halfmove counter is the number of the last previous positions with 
+    the same pawns and number of pieces as the position: the plies since the 
+    last capture or pawn move, which the engine looks back to find 
+    repetitions.
+    """
+    pieces_number = count_squares(position.occupancy[0] | position.occupancy[1])
+    position.halfmove = 0
+    for previous in reversed(positions):
+        if (previous.pawn_key != position.pawn_key 
+                or count_squares(previous.occupancy[0] | previous.occupancy[1]) != pieces_number):
+            break
+        position.halfmove += 1
+    return [previous.key for previous in positions]
+
+
+def start_pondering(color):
+    """Start the CPU's search of the position after the expected move of the player of a color, while the player thinks it.
+    
+    The expected move is the one kept from the CPU's last search, if it can 
+    be played with the list of pieces. The Zobrist key of the position after 
+    it is kept to find out if the player plays it.
+    """
+    global ponder_key
+    position = BitboardPosition.from_pieces(pieces, color)
+    if ponder_move is None or ponder_move not in position.legal_moves():
+        return
+    ponder_pieces = deepcopy(pieces)
+    promotion = PIECE_NAMES[ponder_move >> 12] if ponder_move >> 12 else "Q"
+    make_move(position.to_movement(ponder_move), ponder_pieces, promotion)
+    ponder_position = BitboardPosition.from_pieces(ponder_pieces, "b" if color == "w" else "w")
+    ponder_key = ponder_position.key
+    cpu_engine.ponder(ponder_position, get_game_history(ponder_position, game_positions + [position]))
+
+
+def cpu_turn(color, notation, engine="search"):
+    """Reproduce the sequence of the CPU turn for a color.
+    
+    The 'engine' argument selects how the CPU moves are chosen: 'search' for 
+    the best move found by the engine, or a random move generated with the 
+    list of pieces ('pieces') or with a bitboard position ('bitboards'). The 
+    engine is given the previous positions of the game to find repetitions.
+    
+    The opening book, which is opened once when the application starts, is 
+    consulted first, and a move of the book is played without searching. If the CPU was pondering on the position after the 
+    player's expected move and the player played it, the result of the 
+    pondering is used; otherwise the pondering is discarded and the position 
+    is searched.
+    """
+    global ponder_move
     turn = 0 if color == "w" else 1
-    chess_move = choice(check_allowed_movements(color, pieces))
-    piece = seek_piece(chess_move[1], pieces)
-    piece.move(chess_move[2], pieces)
-    chess_move = chess_move[0] + chess_move[1] + "-" + chess_move[2]
+    promotion = "Q"
+    position = BitboardPosition.from_pieces(pieces, color)
+    book_move = opening_book.choose_move(position) if engine == "search" else None
+    if book_move is not None:
+        cpu_engine.stop_ponder()
+        ponder_move = None
+        chess_move = position.to_movement(book_move)
+        if book_move >> 12:
+            promotion = PIECE_NAMES[book_move >> 12]
+        print("The CPU has played a move of its opening book.", end="\n\n")
+    elif engine == "search":
+        result = None
+        if cpu_engine.is_pondering():
+            if position.key == ponder_key:
+                result = cpu_engine.ponder_hit(CPU_MOVE_TIME)
+            else:
+                cpu_engine.stop_ponder()
+        if result is not None and result["depth"]:
+            print("The CPU expected your move and searched it while you were thinking.", end="\n\n")
+        else:
+            result = cpu_engine.search(position, movetime=CPU_MOVE_TIME, history=get_game_history(position, game_positions))
+        ponder_move = cpu_engine.get_ponder_move(position, result)
+        chess_move = position.to_movement(result["move"])
+        if result["move"] >> 12:
+            promotion = PIECE_NAMES[result["move"] >> 12]
+        print(f"The CPU has searched {result['depth']} plies: {result['nodes']} nodes in "
+              f"{result['time']:.2f} s ({result['nps']:.0f} nodes per second).", end="\n\n")
+    elif engine == "bitboards":
+        chess_move = position.to_movement(choice(position.legal_moves()))
+    else:
+        chess_move = choice(check_allowed_movements(color, pieces))
+    if seek_piece(chess_move[2], pieces):
+        print("A piece has been captured!", end="\n\n")
+    make_move(chess_move, pieces, promotion)
+    if chess_move[0] == "K" and abs(COLS.index(chess_move[1][0]) - COLS.index(chess_move[2][0])) == 2:
+        chess_move = "0-0" if chess_move[2][0] == "g" else "0-0-0"
+    else:
+        chess_move = chess_move[0] + chess_move[1] + "-" + chess_move[2]
     notation[turn].append(get_move_notation(chess_move))
 
 
@@ -427,10 +528,19 @@ def comment_move():
     return input(">> Introduce a comment to the move: ")
     
 
-def play(w_player="player", b_player="cpu", turn = "w", setting=False):
-    """Reproduce the sequence of a chess game."""
-    global notation
+def play(w_player="player", b_player="cpu", turn = "w", setting=False, engine="search"):
+    """Reproduce the sequence of a chess game.
+    
+    The 'engine' argument selects how the CPU moves are chosen: 'search', 
+    'pieces' or 'bitboards' (see 'cpu_turn'). While a player plays against 
+    the CPU's search, the CPU ponders on the player's expected move.
+    """
+    global notation, cpu_engine, ponder_move, game_positions
     notation = [["White"], ["Black"]]
+    cpu_engine = Engine()
+    ponder_move = None
+    game_positions = []
+    pondering = engine == "search" and "cpu" in (w_player, b_player)
     
     if turn == "b":
         notation[0].append("...")
@@ -454,6 +564,7 @@ def play(w_player="player", b_player="cpu", turn = "w", setting=False):
         
         if is_checkmate(color_turn, pieces):
             result = [" 1 ", " 0 "] if color_turn == "b" else [" 0 ", " 1 "]
+            cpu_engine.stop_ponder()
             screen_reset()
             print_set_and_play_header() if setting else print_play_game_header()
             print_play_game_playing(pieces, notation, result)
@@ -472,6 +583,7 @@ def play(w_player="player", b_player="cpu", turn = "w", setting=False):
             
         elif is_stalemate(color_turn, pieces):
             result = ["1/2", "1/2"]
+            cpu_engine.stop_ponder()
             screen_reset()
             print_set_and_play_header() if setting else print_play_game_header()
             print_play_game_playing(pieces, notation, result)
@@ -490,6 +602,7 @@ def play(w_player="player", b_player="cpu", turn = "w", setting=False):
             
         elif fifty_moves_draw_rule(moves_counter):
             result = ["1/2", "1/2"]
+            cpu_engine.stop_ponder()
             screen_reset()
             print_set_and_play_header() if setting else print_play_game_header()
             print_play_game_playing(pieces, notation, result)
@@ -509,12 +622,19 @@ def play(w_player="player", b_player="cpu", turn = "w", setting=False):
         if is_check(color_turn, pieces):
             print("-- Check! --", end= "\n\n")
             
+        position, moves_number = BitboardPosition.from_pieces(pieces, color_turn), len(notation[color_num])
         if [w_player, b_player][color_num] == "cpu":
-            cpu_turn(color_turn, notation)
+            start = perf_counter()
+            cpu_turn(color_turn, notation, engine=engine)
+            sleep(max(0.0, TURN_PAUSE - (perf_counter() - start)))
         else:
+            if pondering and not cpu_engine.is_pondering():
+                start_pondering(color_turn)
             player_turn(color_turn, notation, setting=setting)
-            
-        sleep(2)
+            sleep(TURN_PAUSE)
+        if len(notation[color_num]) > moves_number:
+            game_positions.append(position)
+
         screen_reset()
         print_set_and_play_header() if setting else print_play_game_header()
         print_play_game_playing(pieces, notation)
@@ -589,7 +709,7 @@ def is_setting_position_correct(turn):
 def setting_position():
     """Define the position in setting mode."""
     global pieces, game_start_setting, setting_notation
-    pieces, setting_notation = [], [["White"], ["Black"]]
+    pieces, setting_notation = Board(), [["White"], ["Black"]]
     
     repeat = True
     while repeat:
@@ -765,79 +885,36 @@ def set_and_play():
             
 ### MODE 3: Analyze a game ###
 
-def create_move_list(chess_notation):
-    """Create a list which includes game's chess moves as elements."""
-    move_list = []
-    turn = "b" if chess_notation[0][1] == "..." else "w"
-    if len(chess_notation[0]) > len(chess_notation[1]):
-        chess_notation[1].append("...")
-    for w_move, b_move in zip(chess_notation[0], chess_notation[1]):
-        if w_move.upper() != "WHITE" and b_move.upper() != "BLACK":
-            move_list.append(w_move)
-            move_list.append(b_move)
-    while "..." in move_list:
-        move_list.remove("...")
-    return (move_list, turn)
-
-
-def reproduce_game(starting_position, turn, move_list, move_counter, players, tournament, result, solving=False):
+def reproduce_game(turn, move_list, move_counter, players, tournament, result, solving=False):
     """Reproduces a game from its starting position to a determined move.
+    
+    The board of the game and the records of the moves made in it are kept 
+    between calls, so the moves are made forward or unmade backward from the 
+    last move reproduced.
 
     Arguments:
 
-    starting_position -- the starting position of the game.
     turn -- the color which is going to play first.
     move_list -- a list with the moves of the game.
     move counter -- the last move in notation which is going to be reproduced.
     result -- the result of the game.
     solving (optional) -- 'True' if it is solving a problem. By default 'False'
     """
-    global pieces
-    
     first_turn = turn
-    pieces = deepcopy(starting_position)
     other = "b" if turn == "w" else "w"
-    chess_notation = [["White"], ["Black"]]
     
-    for i, move in enumerate(move_list):
-        color = 0 if turn == "w" else 1
-        if i < move_counter:
-            if move[:5] == "0-0-0":
-                if turn == "w":
-                    seek_piece("e1", pieces).set_position("c1")
-                    seek_piece("a1", pieces).set_position("d1")
-                elif turn == "b":
-                    seek_piece("e8", pieces).set_position("c8")
-                    seek_piece("a8", pieces).set_position("d8")
-                chess_notation[color].append(move)
-            
-            elif move[:3] == "0-0":
-                if turn == "w":
-                    seek_piece("e1", pieces).set_position("g1")
-                    seek_piece("h1", pieces).set_position("f1")
-                elif turn == "b":
-                    seek_piece("e8", pieces).set_position("g8")
-                    seek_piece("h8", pieces).set_position("f8")
-                chess_notation[color].append(move)
-                    
-            else:
-                m_piece = move[0].upper()
-                m_init = move[1:3].lower()
-                m_ends = move[4:6].lower()
-
-                piece = seek_piece(m_init, pieces)
-                if seek_piece(m_ends, pieces):
-                    pieces.remove(seek_piece(m_ends, pieces))
-                piece.set_position(m_ends)
-
-                if m_piece == "P" and m_ends[-1] in "1/8":
-                    create(move[7], piece.color, piece.position, pieces)
-                    pieces.remove(piece)
-                
-                chess_notation[color].append(move)
-            turn, other = other, turn
-        else:
-            break
+    while len(game_records) < move_counter:
+        move = move_list[len(game_records)]
+        color = turn if len(game_records) % 2 == 0 else other
+        movement, promotion = get_game_movement(move, color)
+        game_records.append(make_move(movement, pieces, promotion))
+    while len(game_records) > move_counter:
+        unmake_move(game_records.pop(), pieces)
+    
+    chess_notation = [["White"], ["Black"]]
+    for i, move in enumerate(move_list[:move_counter]):
+        color = 0 if (turn == "w") == (i % 2 == 0) else 1
+        chess_notation[color].append(move)
             
     result = result if (result and move_counter == len(move_list)) else None
 
@@ -892,18 +969,18 @@ def execute_analyzing_options():
 
 def analyze_game(game_name):
     """The main function for the 'Analyze a game' game mode."""
-    global pieces, notation
+    global pieces, notation, game_records
     g_info = load_game(game_name)
     move_list, turn = create_move_list(g_info["notation"])
     move_counter = 0
     
-    pieces = g_info["starting_position"]
+    pieces, game_records = Board(deepcopy(g_info["starting_position"])), []
     notation = g_info["notation"]
     players = [g_info["white_player"], g_info["black_player"]] 
     tournament = g_info["tournament_year"]
     result = g_info["result"]
     
-    reproduce_game(g_info["starting_position"], turn, move_list, move_counter, players, tournament, result)
+    reproduce_game(turn, move_list, move_counter, players, tournament, result)
     
     repeat = True
     while repeat:
@@ -925,7 +1002,6 @@ def analyze_game(game_name):
             if option.upper() == "N" and move_counter != len(move_list):
                 move_counter = increase(move_counter, 1)
                 reproduce_game(
-                    g_info["starting_position"], 
                     turn, move_list, 
                     move_counter, 
                     players,
@@ -938,7 +1014,6 @@ def analyze_game(game_name):
             elif option.upper() == "B" and move_counter != 0:
                 move_counter = increase(move_counter, -1)
                 reproduce_game(
-                    g_info["starting_position"], 
                     turn, move_list, 
                     move_counter, 
                     players,
@@ -993,12 +1068,12 @@ def execute_solving_options():
                 
 def solve_problem(problem_name):
     """The main function for the 'Solve a problem' game mode."""
-    global pieces, notation
+    global pieces, notation, game_records
     g_info = load_game(problem_name)
     move_list, turn = create_move_list(g_info["notation"])
     move_counter = 0
     
-    pieces = g_info["starting_position"]
+    pieces, game_records = Board(deepcopy(g_info["starting_position"])), []
     notation = g_info["notation"]
     players = [g_info["white_player"], g_info["black_player"]] 
     tournament = g_info["tournament_year"]
@@ -1012,7 +1087,7 @@ def solve_problem(problem_name):
 
         screen_reset()
         print_solve_problem_header()
-        reproduce_game(g_info["starting_position"], turn, move_list, move_counter, players, tournament, result, solving=True)
+        reproduce_game(turn, move_list, move_counter, players, tournament, result, solving=True)
 
         if move_counter == len(move_list):
             print("-- Congratulations! The problem is solved. --", end="\n\n")
@@ -1571,4 +1646,8 @@ def execute_solve_problem_mode():
 ##### EXECUTABLE #####
 
 if __name__ == "__main__":
-    execute_main_menu()
\ No newline at end of file
+    opening_book = OpeningBook(BOOK_FILE)
+    try:
+        execute_main_menu()
+    finally:
+        opening_book.close()
\ No newline at end of file
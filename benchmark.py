@@ -0,0 +1,276 @@
+"""Benchmark module.
+
+This module measures the performance of the rules of 'Chess Masters'.
+
+The module includes:
+
+    - Functions that build the positions used in the benchmarks.
+    - Benchmarks that compare the different implementations of the rules.
+    - The executable part of the code when the module is open as a script,
+      which runs every benchmark and prints its results.
+
+Benchmark module is not part of the application. It is a tool for the
+developers to check that the changes in the Rules module make it faster.
+
+"""
+
+
+
+##### IMPORTS #####
+
+from copy import deepcopy
+from os import cpu_count
+import pickle
+from timeit import repeat
+from tracemalloc import get_traced_memory, start, stop
+
+from rules import *
+from engine import Engine, ParallelEngine
+from perft import REFERENCE_POSITIONS
+
+
+
+##### CONSTANTS #####
+
+"""
+The constant 'REPEAT' represents the number of times each benchmark is
+repeated, while 'NUMBER' represents the number of calls timed in each
+repetition. The best repetition is the one reported.
+
+The constant 'SEARCH_DEPTH' is the depth of the engine's search in each of the 
+reference positions of the perft suite.
+
+The constant 'SELECTIVE_MOVE_TIME' is the time, in seconds, of the engine's
+search in each reference position when the depth reached with and without the
+selective search is compared. 'SELECTIVE_OPTIONS' gives the name and the
+options of the engine of each compared search.
+
+"""
+
+REPEAT = 5
+NUMBER = 20
+SEARCH_DEPTH = 4
+SELECTIVE_MOVE_TIME = 1.0
+SELECTIVE_OPTIONS = [
+    ("None", {"null_move": False, "late_move_reductions": False, "futility_pruning": False}),
+    ("Null move", {"null_move": True, "late_move_reductions": False, "futility_pruning": False}),
+    ("Reductions", {"null_move": False, "late_move_reductions": True, "futility_pruning": False}),
+    ("Futility", {"null_move": False, "late_move_reductions": False, "futility_pruning": True}),
+    ("All", {"null_move": True, "late_move_reductions": True, "futility_pruning": True}),
+]
+
+
+"""
+The constant 'GAME_POSITIONS' gives the saved games, by their file name without
+the '.pickle' extension, and the plies of the middlegame positions taken from
+them to compare the principal variation search and the aspiration windows.
+They are searched to 'WINDOW_DEPTH' with each of the 'WINDOW_OPTIONS'.
+
+"""
+
+GAME_POSITIONS = [("game_of_century", (16, 24, 32, 40)),
+                  ("inmortal_anderssen", (12, 18, 24, 30))]
+WINDOW_DEPTH = 6
+WINDOW_OPTIONS = [
+    ("Alpha-beta", {"principal_variation_search": False, "aspiration_windows": False}),
+    ("PVS", {"principal_variation_search": True, "aspiration_windows": False}),
+    ("PVS and aspiration", {"principal_variation_search": True, "aspiration_windows": True}),
+]
+
+
+"""
+The constant 'PARALLEL_DEPTH' is the depth of the parallel search of each
+reference position, which is timed with each number of workers of
+'PARALLEL_WORKERS' (up to the CPUs of the machine) to find its speedup.
+
+"""
+
+PARALLEL_DEPTH = 5
+PARALLEL_WORKERS = (1, 2, 4, 8)
+
+
+
+##### FUNCTIONS: POSITIONS #####
+
+def get_classic_pieces(pieces):
+    """Introduce the pieces of the classic chess starting position in a given list of pieces."""
+    for piece_name, column in zip("RNBQKBNR", COLS):
+        create(piece_name, "w", column + "1", pieces)
+        create("P", "w", column + "2", pieces)
+        create(piece_name, "b", column + "8", pieces)
+        create("P", "b", column + "7", pieces)
+    return pieces
+
+
+def get_dict_pieces(pieces):
+    """Return a list with copies of the given pieces laid out as before '__slots__'."""
+    return [DictPiece(piece) for piece in pieces]
+
+
+def get_game_positions(game_name, plies):
+    """Return the FENs of the positions of a saved game after the given numbers of plies."""
+    with open(game_name + ".pickle", "rb") as file:
+        game_info = pickle.load(file)
+    move_list, turn = create_move_list(game_info["notation"])
+    position = BitboardPosition.from_pieces(game_info["starting_position"], turn)
+    fens = []
+    for ply, move in enumerate(move_list[:max(plies)], 1):
+        movement, promotion = get_game_movement(move, position.color)
+        position.make_move(position.from_movement(movement, promotion))
+        if ply in plies:
+            fens.append(position.to_fen())
+    return fens
+
+
+
+##### FUNCTIONS: BENCHMARKS #####
+
+def best_time(function, number=NUMBER):
+    """Return the best time, in seconds per call, of a given function."""
+    return min(repeat(function, repeat=REPEAT, number=number)) / number
+
+
+def get_memory(function):
+    """Return the memory, in bytes, allocated by a call of a given function and still held by its result."""
+    start()
+    result = function()
+    memory = get_traced_memory()[0]
+    stop()
+    del result
+    return memory
+
+
+def benchmark_seek_piece():
+    """Compare 'check_allowed_movements' in the starting position with a list of pieces and with a board."""
+    pieces = get_classic_pieces([])
+    board = get_classic_pieces(Board())
+    assert check_allowed_movements("w", pieces) == check_allowed_movements("w", board)
+
+    list_time = best_time(lambda: check_allowed_movements("w", pieces))
+    board_time = best_time(lambda: check_allowed_movements("w", board))
+
+    print("check_allowed_movements from the starting position:")
+    print(f"    List of pieces: {list_time * 1000:8.3f} ms")
+    print(f"    Board:          {board_time * 1000:8.3f} ms")
+    print(f"    Speedup:        {list_time / board_time:8.2f}x", end="\n\n")
+
+
+def benchmark_legal_movements():
+    """Compare trying every movement in the board with the check and pin aware 'check_allowed_movements'."""
+    board = get_classic_pieces(Board())
+    assert filter_allowed_movements("w", board) == check_allowed_movements("w", board)
+
+    filter_time = best_time(lambda: filter_allowed_movements("w", board))
+    legal_time = best_time(lambda: check_allowed_movements("w", board))
+
+    print("Legal movements from the starting position:")
+    print(f"    Trying each movement: {filter_time * 1000:8.3f} ms")
+    print(f"    Checks and pins:      {legal_time * 1000:8.3f} ms")
+    print(f"    Speedup:              {filter_time / legal_time:8.2f}x", end="\n\n")
+
+
+def benchmark_piece_layout():
+    """Compare the memory and the copy time of the starting position with the pieces in slots and in a '__dict__'."""
+    board = get_classic_pieces(Board())
+    dict_pieces = get_dict_pieces(board)
+
+    dict_memory = get_memory(lambda: get_dict_pieces(board))
+    slots_memory = get_memory(lambda: get_classic_pieces(Board()))
+    dict_time = best_time(lambda: deepcopy(dict_pieces))
+    slots_time = best_time(lambda: deepcopy(board))
+
+    print("Starting position with the pieces in a '__dict__' and in slots:")
+    print(f"    Memory, '__dict__':   {dict_memory:8d} bytes")
+    print(f"    Memory, slots:        {slots_memory:8d} bytes")
+    print(f"    Deepcopy, '__dict__': {dict_time * 1000:8.3f} ms")
+    print(f"    Deepcopy, slots:      {slots_time * 1000:8.3f} ms")
+    print(f"    Speedup:              {dict_time / slots_time:8.2f}x", end="\n\n")
+
+
+def benchmark_search(depth=SEARCH_DEPTH):
+    """Measure the nodes per second of the engine's search of the reference positions to a given depth."""
+    print(f"Engine search to depth {depth}:")
+    total_nodes, total_time = 0, 0.0
+    for name, fen, _ in REFERENCE_POSITIONS:
+        result = Engine().search(BitboardPosition.from_fen(fen), depth)
+        total_nodes, total_time = total_nodes + result["nodes"], total_time + result["time"]
+        print(f"    {name:<16} {result['nodes']:>8} nodes {result['time']:8.3f} s {result['nps']:>8.0f} nps")
+    print(f"    {'Total':<16} {total_nodes:>8} nodes {total_time:8.3f} s {total_nodes / total_time:>8.0f} nps", end="\n\n")
+
+
+def benchmark_selective_search(movetime=SELECTIVE_MOVE_TIME):
+    """Compare the depth reached by the engine's search of the reference positions in a given time with each selective search option."""
+    print(f"Engine search for {movetime} s, average depth reached:")
+    for option_name, options in SELECTIVE_OPTIONS:
+        depths = [Engine(**options).search(BitboardPosition.from_fen(fen), movetime=movetime)["depth"]
+                  for _, fen, _ in REFERENCE_POSITIONS]
+        print(f"    {option_name:<12} {sum(depths) / len(depths):6.2f}  {depths}")
+    print()
+
+
+def benchmark_search_windows(depth=WINDOW_DEPTH):
+    """Compare the nodes and re-searches of the engine's search of the middlegame positions of the saved games with and without the principal variation search and the aspiration windows."""
+    fens = [fen for game_name, plies in GAME_POSITIONS for fen in get_game_positions(game_name, plies)]
+    print(f"Engine search to depth {depth} of {len(fens)} positions of the saved games:")
+    for option_name, options in WINDOW_OPTIONS:
+        total_nodes, total_time, aspiration_researches, pvs_researches = 0, 0.0, 0, 0
+        depth_nodes = [0] * depth
+        for fen in fens:
+            result = Engine(**options).search(BitboardPosition.from_fen(fen), depth)
+            total_nodes, total_time = total_nodes + result["nodes"], total_time + result["time"]
+            for iteration in result["iterations"]:
+                depth_nodes[iteration["depth"] - 1] += iteration["nodes"]
+                aspiration_researches += iteration["aspiration_researches"]
+                pvs_researches += iteration["pvs_researches"]
+        print(f"    {option_name:<18} {total_nodes:>8} nodes {total_time:8.3f} s  re-searches {aspiration_researches:>3} "
+              f"aspiration {pvs_researches:>5} PVS")
+        print(f"    {'':<18} nodes per depth {depth_nodes}")
+    print()
+
+
+def benchmark_parallel_search(depth=PARALLEL_DEPTH):
+    """Compare the time of the parallel search of the reference positions to a given depth with one worker and with more."""
+    workers_list = [workers for workers in PARALLEL_WORKERS if workers == 1 or workers <= cpu_count()]
+    print(f"Parallel engine search to depth {depth} ({cpu_count()} CPUs):")
+    base_time = None
+    for workers in workers_list:
+        engine = ParallelEngine(workers)
+        total_nodes, total_time = 0, 0.0
+        for _, fen, _ in REFERENCE_POSITIONS:
+            engine.table.clear()
+            result = engine.search(BitboardPosition.from_fen(fen), depth)
+            total_nodes, total_time = total_nodes + result["nodes"], total_time + result["time"]
+        engine.close()
+        base_time = base_time or total_time
+        print(f"    {workers:>2} workers {total_nodes:>8} nodes {total_time:8.3f} s {total_nodes / total_time:>8.0f} nps"
+              f"  speedup {base_time / total_time:5.2f}x")
+    print()
+
+
+
+##### CLASSES #####
+
+class DictPiece:
+    """Piece with its attributes in a '__dict__', as the pieces were before '__slots__'."""
+    def __init__(self, piece):
+        """Construction of a copy of a piece."""
+        self.name = piece.name
+        self.color = piece.color
+        self.position = piece.position
+        self.column = piece.column
+        self.row = piece.row
+        if piece.name in "KR":
+            self.castling = piece.castling
+
+
+
+##### EXECUTABLE #####
+
+if __name__ == "__main__":
+    benchmark_seek_piece()
+    benchmark_legal_movements()
+    benchmark_piece_layout()
+    benchmark_search()
+    benchmark_selective_search()
+    benchmark_search_windows()
+    benchmark_parallel_search()
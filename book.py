@@ -0,0 +1,356 @@
+"""Book module.
+
+This module develops the opening book of the CPU player in 'Chess Masters'.
+
+The module includes:
+
+    - The binary format of the book: a file of fixed-width records with the
+      Zobrist key of a position, a move, its weight and its learning value,
+      sorted by key and move.
+    - A function that builds the book from a stream of saved games: a pool
+      of processes finds the moves played in their first plies, which are
+      counted in chunks of bounded size, spilled to sorted runs on disk and
+      merged into the book file. The games that cannot be read are skipped
+      and counted.
+    - A class that reads the book through a memory map and finds the moves
+      of a position with a binary search, so the book is never loaded, and
+      chooses one of them at random by its weight.
+    - The executable part of the code when the module is open as a script,
+      which builds the book from the saved games given by their names or
+      from every saved game in a directory.
+
+Book module works with the bitboard positions of the Rules module. The
+application consults the book before searching a CPU move.
+
+"""
+
+
+
+##### IMPORTS #####
+
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from heapq import merge
+from itertools import groupby, islice
+from mmap import mmap, ACCESS_READ
+from os import cpu_count, path
+import pathlib
+import pickle
+from random import Random
+from struct import Struct
+from tempfile import TemporaryDirectory
+
+from rules import *
+
+
+
+##### CONSTANTS #####
+
+"""
+The constant 'BOOK_ENTRY' is the binary format of a record of the book: the
+Zobrist key of the position (8 bytes), the move (2 bytes), its weight (2
+bytes) and its learning value (2 bytes, signed), padded to 16 bytes.
+'MAX_WEIGHT' is the highest weight of a record: the weights of the moves of a
+position are scaled down together when one of them is higher, so they keep
+their proportions.
+
+The constant 'BOOK_FILE' is the name of the book file in the directory of the
+application, 'BOOK_GAMES' are the names of the saved games it is built from
+by default (without the '.pickle' extension) and 'BOOK_PLIES' is the number of
+plies of each game kept in the book.
+
+The constants 'WIN_WEIGHT', 'DRAW_WEIGHT' and 'LOSS_WEIGHT' are the weights
+added to a move each time it is played in a game won, drawn (or without
+result) and lost by the side that played it.
+
+"""
+
+BOOK_ENTRY = Struct("<QHHh2x")
+MAX_WEIGHT = 65535
+
+BOOK_FILE = "book.bin"
+BOOK_GAMES = ["game_of_century", "inmortal_anderssen"]
+BOOK_PLIES = 20
+
+WIN_WEIGHT = 2
+DRAW_WEIGHT = 1
+LOSS_WEIGHT = 0
+
+
+"""
+The following constants are used by the builder of the book.
+
+The games are sent to the pool of processes in batches of 'GAME_BATCH'. The
+moves are counted in memory until 'CHUNK_SIZE' different moves are counted,
+and then they are spilled to a run: a temporary file of records in the
+binary format 'RUN_ENTRY', sorted by key and move, with the Zobrist key of
+the position (8 bytes), the move (2 bytes), the times it was played (4 bytes)
+and its weight (4 bytes), padded to 24 bytes. The runs are read in blocks of
+'RUN_BUFFER' records when they are merged. The moves played less than
+'MIN_COUNT' times are left out of the book.
+
+"""
+
+GAME_BATCH = 256
+CHUNK_SIZE = 200000
+RUN_ENTRY = Struct("<QHII6x")
+RUN_BUFFER = 4096
+MIN_COUNT = 1
+
+
+
+##### FUNCTIONS #####
+
+def get_book_key(position):
+    """Return the Zobrist key of a position without its en passant square, which the list of pieces does not keep."""
+    en_passant = position.en_passant
+    key = position.key ^ position.get_state_key()
+    position.en_passant = None
+    key ^= position.get_state_key()
+    position.en_passant = en_passant
+    return key
+
+
+def get_result_weights(result):
+    """Return the weights of the moves of white and black in a game with a given result."""
+    white_result = result[0].strip() if result else ""
+    if white_result == "1":
+        return WIN_WEIGHT, LOSS_WEIGHT
+    if white_result == "0":
+        return LOSS_WEIGHT, WIN_WEIGHT
+    return DRAW_WEIGHT, DRAW_WEIGHT
+
+
+def get_game_entries(game_name, plies=BOOK_PLIES):
+    """Return the key, move and weight of each of the first plies of a saved game.
+
+    The 'game_name' argument is the file name WITHOUT the extension
+    '.pickle'. Every move is weighted by the result of the game for the side
+    that played it. A move that is not legal in its position raises an
+    'IllegalMoveError'.
+    """
+    with open(game_name + ".pickle", "rb") as file:
+        game_info = pickle.load(file)
+    move_list, turn = create_move_list(game_info["notation"])
+    weights = get_result_weights(game_info["result"])
+    position = BitboardPosition.from_pieces(game_info["starting_position"], turn)
+    entries = []
+    for move_name in move_list[:plies]:
+        movement, promotion = get_game_movement(move_name, position.color)
+        move = position.from_movement(movement, promotion)
+        if move not in position.legal_moves():
+            raise IllegalMoveError(f"'{move_name}' is not a legal move in the game '{game_name}'")
+        entries.append((get_book_key(position), move, weights[position.side]))
+        position.make_move(move)
+    return entries
+
+
+def scale_weights(weights):
+    """Return the weights of the moves of a position scaled so the highest one is at most 'MAX_WEIGHT', and none of them falls to 0."""
+    highest = max(weights)
+    if highest <= MAX_WEIGHT:
+        return weights
+    return [max(1, weight * MAX_WEIGHT // highest) for weight in weights]
+
+
+def read_game_entries(game_name, plies=BOOK_PLIES):
+    """Return the book entries of a saved game, or 'None' if the game cannot be read or its notation cannot be played."""
+    try:
+        return get_game_entries(game_name, plies)
+    except (OSError, EOFError, pickle.UnpicklingError, KeyError, IndexError, ValueError, IllegalMoveError):
+        return None
+
+
+def write_book(entries, file_name=BOOK_FILE):
+    """Write the book file from an iterable of keys, moves and weights sorted by key and move, and return its number of records."""
+    records = 0
+    with open(file_name, "wb") as file:
+        for key, key_entries in groupby(entries, lambda entry: entry[0]):
+            moves = [(move, weight) for _, move, weight in key_entries if weight > 0]
+            if not moves:
+                continue
+            for (move, _), weight in zip(moves, scale_weights([weight for _, weight in moves])):
+                file.write(BOOK_ENTRY.pack(key, move, weight, 0))
+            records += len(moves)
+    return records
+
+
+def get_game_batches(game_names, plies, executor):
+    """Yield the book entries of each game of a stream of game names, found in batches by a pool of processes, or 'None' for a game that cannot be read."""
+    game_names = iter(game_names)
+    while True:
+        batch = list(islice(game_names, GAME_BATCH))
+        if not batch:
+            return
+        yield from executor.map(read_game_entries, batch, [plies] * len(batch))
+
+
+def write_run(counts, file_name):
+    """Write the counts and weights of the moves of a chunk to a run file, sorted by key and move."""
+    with open(file_name, "wb") as file:
+        for (key, move), (count, weight) in sorted(counts.items()):
+            file.write(RUN_ENTRY.pack(key, move, count, weight))
+
+
+def read_run(file_name):
+    """Yield the key, move, count and weight of each record of a run file."""
+    with open(file_name, "rb") as file:
+        while True:
+            block = file.read(RUN_ENTRY.size * RUN_BUFFER)
+            if not block:
+                return
+            yield from RUN_ENTRY.iter_unpack(block)
+
+
+def merge_runs(file_names, min_count=MIN_COUNT):
+    """Yield the key, move and weight of each move of a set of run files, merged in order, if it was played at least a minimum number of times."""
+    entry_key = entry_move = None
+    total_count = total_weight = 0
+    for key, move, count, weight in merge(*[read_run(file_name) for file_name in file_names]):
+        if key == entry_key and move == entry_move:
+            total_count, total_weight = total_count + count, total_weight + weight
+            continue
+        if entry_key is not None and total_count >= min_count:
+            yield entry_key, entry_move, total_weight
+        entry_key, entry_move, total_count, total_weight = key, move, count, weight
+    if entry_key is not None and total_count >= min_count:
+        yield entry_key, entry_move, total_weight
+
+
+def build_book(game_names=BOOK_GAMES, file_name=BOOK_FILE, plies=BOOK_PLIES, min_count=MIN_COUNT, workers=None,
+               chunk_size=CHUNK_SIZE):
+    """Build the book file from the first plies of a stream of saved games of given names and return its number of records and of skipped games.
+
+    The games are read one at a time by a pool of processes ('workers', all
+    the CPUs of the machine by default), which find the key, move and weight
+    of their plies. The times each move is played in a position and its
+    weights are added up in a chunk of at most 'chunk_size' moves, which is
+    spilled to a sorted run on disk when it is full. The runs are merged into
+    the book, leaving out the moves played less than 'min_count' times and
+    those whose weight is 0, so the memory used does not grow with the
+    number of games. A game that cannot be read, or whose notation cannot be
+    played, is skipped without stopping the build.
+    """
+    with TemporaryDirectory() as directory, ProcessPoolExecutor(workers) as executor:
+        runs, counts, skipped = [], {}, 0
+        for entries in get_game_batches(game_names, plies, executor):
+            if entries is None:
+                skipped += 1
+                continue
+            for key, move, weight in entries:
+                count, total_weight = counts.get((key, move), (0, 0))
+                counts[key, move] = count + 1, total_weight + weight
+            if len(counts) >= chunk_size:
+                runs.append(path.join(directory, f"run{len(runs)}.bin"))
+                write_run(counts, runs[-1])
+                counts = {}
+        if counts:
+            runs.append(path.join(directory, f"run{len(runs)}.bin"))
+            write_run(counts, runs[-1])
+        return write_book(merge_runs(runs, min_count), file_name), skipped
+
+
+def get_directory_games(directory):
+    """Yield the names, without the '.pickle' extension, of the saved games of a directory."""
+    for item in sorted(pathlib.Path(directory).glob("*.pickle")):
+        yield str(item.with_suffix(""))
+
+
+
+##### CLASSES #####
+
+class IllegalMoveError(Exception):
+    """Exception raised when a move of a saved game is not legal in its position."""
+
+
+class OpeningBook:
+    """Class for an opening book read from its file through a memory map.
+
+    The records of the book are sorted by key, so the moves of a position are
+    found with a binary search on the memory map, without reading the whole
+    file. A book whose file does not exist is empty. The memory map is
+    released with 'close'.
+    """
+    def __init__(self, file_name=BOOK_FILE, seed=None):
+        """Construction of an opening book instance from a book file, with an optional seed for its random choices."""
+        self.file_name = file_name
+        self.random = Random(seed)
+        self.map = None
+        self.records = 0
+        if path.isfile(file_name) and path.getsize(file_name) >= BOOK_ENTRY.size:
+            with open(file_name, "rb") as file:
+                self.map = mmap(file.fileno(), 0, access=ACCESS_READ)
+            self.records = len(self.map) // BOOK_ENTRY.size
+
+    def __repr__(self):
+        """Representation of an opening book instance."""
+        return f"OpeningBook('{self.file_name}', {self.records} records)"
+
+    def __len__(self):
+        """Return the number of records of the book."""
+        return self.records
+
+    def close(self):
+        """Release the memory map of the book file."""
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+            self.records = 0
+
+    def get_key(self, index):
+        """Return the key of the record of a given index."""
+        return BOOK_ENTRY.unpack_from(self.map, index * BOOK_ENTRY.size)[0]
+
+    def find(self, key):
+        """Return a list with the move, weight and learning value of each record of a Zobrist key."""
+        low, high = 0, self.records
+        while low < high:
+            middle = (low + high) // 2
+            if self.get_key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        moves = []
+        for index in range(low, self.records):
+            entry_key, move, weight, learn = BOOK_ENTRY.unpack_from(self.map, index * BOOK_ENTRY.size)
+            if entry_key != key:
+                break
+            moves.append((move, weight, learn))
+        return moves
+
+    def choose_move(self, position):
+        """Return a legal move of the book for a position, chosen at random by its weight, or 'None' if there is none."""
+        if not self.records:
+            return None
+        legal_moves = position.legal_moves()
+        moves = [(move, weight) for move, weight, _ in self.find(get_book_key(position)) if move in legal_moves]
+        if not moves:
+            return None
+        return self.random.choices([move for move, _ in moves], [weight for _, weight in moves])[0]
+
+
+
+##### EXECUTABLE #####
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Build the opening book of 'Chess Masters' from saved games.")
+    parser.add_argument("games", nargs="*", default=BOOK_GAMES,
+                        help="the names of the saved games without the '.pickle' extension (the sample games by default)")
+    parser.add_argument("--directory", help="build the book from every saved game of a directory instead")
+    parser.add_argument("--book", default=BOOK_FILE, help=f"the name of the book file ('{BOOK_FILE}' by default)")
+    parser.add_argument("--plies", type=int, default=BOOK_PLIES,
+                        help=f"the number of plies of each game kept in the book ({BOOK_PLIES} by default)")
+    parser.add_argument("--min-count", type=int, default=MIN_COUNT,
+                        help=f"the times a move must be played to be kept in the book ({MIN_COUNT} by default)")
+    parser.add_argument("--workers", type=int,
+                        help=f"the number of processes that read the games ({cpu_count()} CPUs here by default)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help=f"the number of moves counted in memory before they are spilled to disk ({CHUNK_SIZE} by default)")
+    arguments = parser.parse_args()
+
+    game_names = get_directory_games(arguments.directory) if arguments.directory else arguments.games
+    records, skipped = build_book(game_names, arguments.book, arguments.plies, arguments.min_count, arguments.workers,
+                                  arguments.chunk_size)
+    print(f"The book '{arguments.book}' has {records} moves.")
+    if skipped:
+        print(f"Games skipped because they could not be read: {skipped}.")
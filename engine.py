@@ -0,0 +1,1176 @@
+"""Engine module.
+
+This module develops the engine that chooses the movements of the CPU player
+in 'Chess Masters'.
+
+The module includes:
+
+    - The evaluation of a position, from the material and the squares of the
+      pieces kept by the position, tapered by the game phase, and from its
+      pawn structure.
+    - A transposition table with a fixed size, which keeps the results of the
+      positions already searched by their Zobrist key, and a pawn hash table,
+      which keeps the evaluation of the pawn structures by the key of the
+      pawns.
+    - The search of the best move of a position: a negamax alpha-beta search
+      with iterative deepening, limited in depth, in nodes or in time (for the
+      move or for the game), which reports its principal variation, its nodes
+      per second and the time it took.
+    - The order of the moves in the search: the hash move, the captures by
+      MVV-LVA, the killer moves and the quiet moves by their history score.
+    - The static exchange evaluation of a capture, and the quiescence search
+      of the captures at the end of the search.
+    - The selective search: null move pruning, late move reductions and
+      futility pruning, each of which can be turned off.
+    - The principal variation search, with aspiration windows at the root.
+    - A hash table kept in shared memory, which processes attach to by its
+      name and read and write without locks, verifying each entry by its
+      checksum. The transposition table of the parallel search and the one
+      of the parallel perft are built on it.
+    - The parallel search (Lazy SMP): worker processes search the same
+      position and share a transposition table kept in shared memory.
+    - The pondering: the search of the position after the expected move of
+      the opponent in a background thread, while the opponent thinks.
+    - The executable part of the code when the module is open as a script,
+      which searches a position given by its FEN.
+
+Engine module works with the bitboard positions of the Rules module, so it can
+be used by the application or on its own.
+
+"""
+
+
+
+##### IMPORTS #####
+
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Event
+from multiprocessing.shared_memory import SharedMemory
+from os import cpu_count
+from random import Random
+from struct import Struct
+from threading import Event as ThreadEvent, Thread
+from time import perf_counter
+
+from rules import *
+
+
+
+##### CONSTANTS #####
+
+"""
+The constant 'ENTRY' is the binary format of an entry of the transposition
+table: the Zobrist key of the position (8 bytes), the best move (2 bytes), the
+score (2 bytes), the depth (1 byte), the bound (1 byte) and the search
+generation (1 byte), padded to 16 bytes. 'BUCKET_SIZE' is the number of
+entries in each bucket of the table.
+
+The constants 'EMPTY', 'EXACT', 'LOWER' and 'UPPER' are the bounds of an
+entry: an empty entry, an exact score, a score that is at least the stored one
+(the search failed high) and a score that is at most the stored one (the
+search failed low).
+
+"""
+
+ENTRY = Struct("<QHhbBBx")
+BUCKET_SIZE = 2
+
+EMPTY, EXACT, LOWER, UPPER = range(4)
+
+
+"""
+The constant 'SHARED_HEADER' is the binary format of the header of a shared
+hash table: its number of entries and a generation, padded to 16 bytes. Each
+entry of the table starts with a checksum of 8 bytes, 'CHECKSUM': the key of
+the entry XORed with every 8 bytes of its data. An entry which was being
+written by another process while it was read does not give back its key, so
+it is ignored without locks.
+
+The constant 'SHARED_ENTRY_DATA' is the binary format of the data of an entry
+of the shared transposition table: the best move, the score, the depth, the
+bound and the search generation, padded to 8 bytes.
+
+"""
+
+SHARED_HEADER = Struct("<QB7x")
+CHECKSUM = Struct("<Q")
+SHARED_ENTRY_DATA = Struct("<HhbBBx")
+
+
+"""
+The constant 'PAWN_ENTRY' is the binary format of an entry of the pawn hash
+table: the key of the pawns (8 bytes), the bitboards of the passed pawns of
+each side (8 bytes each), the middlegame and endgame scores of the pawn
+structure (2 bytes each) and a byte which tells that the entry is in use,
+padded to 32 bytes.
+
+The constants 'DOUBLED_PAWN', 'ISOLATED_PAWN' and 'PASSED_PAWN' are the
+middlegame and endgame scores of the pawn structure: the penalty of each pawn
+behind another one in its column, the penalty of a pawn without pawns of its
+side in the adjacent columns, and the bonus of a pawn without enemy pawns
+ahead of it in its column and the adjacent ones, by its row counted from its
+side. 'FREE_PASSED_PAWN' is the endgame bonus of a passed pawn whose next
+square is empty.
+
+"""
+
+PAWN_ENTRY = Struct("<QQQhhB3x")
+
+DOUBLED_PAWN = (10, 20)
+ISOLATED_PAWN = (10, 15)
+PASSED_PAWN = ((0, 5, 10, 15, 25, 40, 60, 0), (0, 10, 20, 35, 55, 80, 110, 0))
+FREE_PASSED_PAWN = 20
+
+
+"""
+The constant 'MATE' is the score of a checkmate, decreased by the plies needed
+to give it, and 'INFINITE' is greater than any score. 'MAX_PLY' is the deepest
+ply the search can reach, so every score beyond 'MATE - MAX_PLY' is a mate.
+
+The constant 'CHECK_EVALUATION' makes the evaluation check the scores kept by
+the position against the ones computed from all its pieces. It is only meant
+for debugging, as it takes away the speed of the kept scores.
+
+"""
+
+MATE = 30000
+INFINITE = 32000
+MAX_PLY = 64
+CHECK_EVALUATION = False
+
+
+"""
+The constant 'EXCHANGE_VALUES' gives the value of each piece kind in the
+static exchange evaluation, where the king is worth more than any exchange.
+'DELTA_MARGIN' is the margin of the delta pruning of the quiescence search: a
+capture is not searched when even winning the captured piece and this margin
+does not raise the score over alpha.
+
+"""
+
+EXCHANGE_VALUES = PIECE_VALUES[:KING] + (MATE,)
+DELTA_MARGIN = 200
+
+
+"""
+The constant 'KILLERS' is the number of killer moves kept for each ply: the 
+last quiet moves that caused a cutoff at that ply.
+
+"""
+
+KILLERS = 2
+
+
+"""
+The following constants are used by the selective search.
+
+The null move search is reduced by 'NULL_MOVE_REDUCTION' plies more than the
+other moves, and is only tried from 'NULL_MOVE_DEPTH' plies. In the endgames
+with a game phase of 'VERIFICATION_PHASE' or less, where zugzwang is likely,
+a null move cutoff is verified by a reduced search without null moves.
+
+The quiet moves searched after the first 'LATE_MOVE_NUMBER' moves of a node
+with 'LATE_MOVE_DEPTH' plies or more are searched 'LATE_MOVE_REDUCTION' plies
+less, and searched again with all their depth if they raise alpha.
+
+'FUTILITY_MARGINS' gives, for the depths of the frontier nodes, the margin
+over the evaluation of a position below which its quiet moves are not
+searched, as they cannot raise the score over alpha.
+
+"""
+
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_DEPTH = 3
+VERIFICATION_PHASE = 6
+LATE_MOVE_NUMBER = 3
+LATE_MOVE_DEPTH = 3
+LATE_MOVE_REDUCTION = 1
+FUTILITY_MARGINS = (0, 150, 300)
+
+
+"""
+The following constants are used by the aspiration windows of the root.
+
+From the iteration 'ASPIRATION_DEPTH', the root is searched within a window
+of 'ASPIRATION_WINDOW' centipawns around the score of the previous iteration.
+When the score falls out of the window, the window is widened on that side by
+a margin that starts at 'ASPIRATION_WINDOW' and doubles with each re-search.
+
+"""
+
+ASPIRATION_DEPTH = 4
+ASPIRATION_WINDOW = 50
+
+
+"""
+The following constants are used by the time management of the search.
+
+The clock is only read once every 'CLOCK_INTERVAL' nodes (it must be a power 
+of two), which is a small fraction of a second. The time of a move in a game 
+is its share of the time left when 'MOVES_TO_GO' moves are expected until the 
+next time control, plus 'INCREMENT_SHARE' of the increment. It is never more 
+than 'MAX_TIME_SHARE' of the time left minus the 'TIME_MARGIN' (in seconds) 
+kept to play the move. A new iteration is not started once 'SOFT_TIME_SHARE' 
+of the time of the move has passed, as it would most likely not be completed.
+
+"""
+
+CLOCK_INTERVAL = 1024
+MOVES_TO_GO = 30
+INCREMENT_SHARE = 0.75
+MAX_TIME_SHARE = 0.5
+TIME_MARGIN = 0.05
+SOFT_TIME_SHARE = 0.5
+
+
+"""
+The constant 'HISTORY_NOISE' is the highest random history score given to the
+quiet moves by the helper workers of a parallel search, so each one searches
+them in a slightly different order.
+
+"""
+
+HISTORY_NOISE = 64
+
+
+
+##### FUNCTIONS #####
+
+def evaluate(position, pawn_table=None):
+    """Return the score of a position, in centipawns, for the side to move.
+
+    The score is tapered between the middlegame and the endgame scores kept
+    by the position, by its game phase. With a pawn hash table, the scores of
+    the pawn structure are added, and the passed pawns whose next square is
+    empty get a bonus.
+    """
+    if CHECK_EVALUATION:
+        assert (position.midgame, position.endgame, position.phase) == position.get_scores()
+    midgame, endgame = position.midgame, position.endgame
+    if pawn_table is not None:
+        bitboards = position.bitboards
+        pawn_midgame, pawn_endgame, passed_pawns = pawn_table.probe(position.pawn_key, bitboards[PAWN], bitboards[6 + PAWN])
+        midgame += pawn_midgame
+        endgame += pawn_endgame
+        if passed_pawns[0] | passed_pawns[1]:
+            empty = ~(position.occupancy[0] | position.occupancy[1])
+            endgame += FREE_PASSED_PAWN * (count_squares(passed_pawns[0] << 8 & empty) -
+                                           count_squares(passed_pawns[1] >> 8 & empty))
+    phase = min(position.phase, MAX_PHASE)
+    score = (midgame * phase + endgame * (MAX_PHASE - phase)) // MAX_PHASE
+    return -score if position.side else score
+
+
+def count_squares(bitboard):
+    """Return the number of squares set in a bitboard."""
+    return bin(bitboard).count("1")
+
+
+def evaluate_pawns(white_pawns, black_pawns):
+    """Return the middlegame and endgame scores of a pawn structure for the white side, and the bitboards of the passed pawns of each side."""
+    midgame = endgame = 0
+    passed_pawns = [0, 0]
+    for side, pawns, enemy_pawns in ((0, white_pawns, black_pawns), (1, black_pawns, white_pawns)):
+        sign = -1 if side else 1
+        for column_mask in FILE_MASKS:
+            doubled = count_squares(pawns & column_mask) - 1
+            if doubled > 0:
+                midgame -= sign * doubled * DOUBLED_PAWN[0]
+                endgame -= sign * doubled * DOUBLED_PAWN[1]
+        for square in iterate_squares(pawns):
+            if not pawns & ADJACENT_FILE_MASKS[square & 7]:
+                midgame -= sign * ISOLATED_PAWN[0]
+                endgame -= sign * ISOLATED_PAWN[1]
+            if not enemy_pawns & PASSED_PAWN_MASKS[side][square]:
+                passed_pawns[side] |= 1 << square
+                row = 7 - (square >> 3) if side else square >> 3
+                midgame += sign * PASSED_PAWN[0][row]
+                endgame += sign * PASSED_PAWN[1][row]
+    return midgame, endgame, passed_pawns
+
+
+def get_move_time(time_left, increment=0.0, moves_to_go=None):
+    """Return the time, in seconds, to search a move of a game from the time left in the clock, the increment and the moves to the next time control."""
+    move_time = time_left / (moves_to_go or MOVES_TO_GO) + increment * INCREMENT_SHARE
+    return max(0.0, min(move_time, time_left * MAX_TIME_SHARE - TIME_MARGIN))
+
+
+def get_capture_score(position, move):
+    """Return the MVV-LVA score of a capture or promotion: the value it wins, and then the lower value of the moving piece.
+
+    Return 'None' for a quiet move.
+    """
+    squares = position.squares
+    to_square, promotion = move >> 6 & 63, move >> 12
+    attacker, victim = squares[move & 63] % 6, squares[to_square]
+    if victim is not None:
+        gain = PIECE_VALUES[victim % 6]
+    elif attacker == PAWN and to_square == position.en_passant:
+        gain = PIECE_VALUES[PAWN]
+    elif not promotion:
+        return None
+    else:
+        gain = 0
+    if promotion:
+        gain += PIECE_VALUES[promotion] - PIECE_VALUES[PAWN]
+    return gain * 8 - attacker
+
+
+def static_exchange(position, move):
+    """Return the value won by the side to move with a capture when both sides capture in its square with their least valuable attackers.
+
+    The attackers are found with the attack detection of the position, in
+    the occupancy left by the pieces that have already captured, so the
+    sliding pieces behind them join the exchange. Each side can stop
+    capturing when it would lose with it.
+    """
+    bitboards, squares = position.bitboards, position.squares
+    from_square, to_square = move & 63, move >> 6 & 63
+    victim = squares[to_square]
+    gains = [EXCHANGE_VALUES[PAWN if victim is None else victim % 6]]
+    value = EXCHANGE_VALUES[squares[from_square] % 6]
+    occupied = (position.occupancy[0] | position.occupancy[1]) ^ 1 << from_square
+    side = position.side ^ 1
+    while True:
+        attackers = position.attackers(to_square, side, occupied) & occupied
+        if not attackers:
+            break
+        for kind in range(6):
+            pieces = attackers & bitboards[side * 6 + kind]
+            if pieces:
+                break
+        gains.append(value - gains[-1])
+        value = EXCHANGE_VALUES[kind]
+        occupied ^= pieces & -pieces
+        side ^= 1
+    while len(gains) > 1:
+        gain = gains.pop()
+        gains[-1] = -max(-gains[-1], gain)
+    return gains[0]
+
+
+def get_pv_names(pv):
+    """Return the names of the moves of a principal variation, separated by spaces."""
+    return " ".join(get_move_name(move) for move in pv)
+
+
+def start_worker(table_name, stop_event, options):
+    """Create the engine of a worker process of a parallel search, with the shared transposition table of a given name and a dictionary of engine options."""
+    global worker_engine
+    worker_engine = Engine(table=SharedTranspositionTable(name=table_name), stop_event=stop_event, **options)
+
+
+def search_worker(fen, worker, limits):
+    """Search the position of a given FEN with the engine of a worker process and return its result."""
+    worker_engine.worker = worker
+    return worker_engine.search(BitboardPosition.from_fen(fen), **limits)
+
+
+def get_passed_pawn_masks():
+    """Return a table with the bitboard of the squares ahead of a pawn of each side in its column and the adjacent ones."""
+    masks = [[0] * 64, [0] * 64]
+    for square in range(64):
+        columns = FILE_MASKS[square & 7] | ADJACENT_FILE_MASKS[square & 7]
+        row = square >> 3
+        masks[0][square] = columns & (FULL_BOARD << 8 * (row + 1)) & FULL_BOARD
+        masks[1][square] = columns & ((1 << 8 * row) - 1)
+    return masks
+
+
+
+##### TABLES #####
+
+"""
+The table 'FILE_MASKS' gives the bitboard of each column, and
+'ADJACENT_FILE_MASKS' the bitboard of the columns next to it.
+'PASSED_PAWN_MASKS' gives, for each side and square's index, the squares
+where an enemy pawn stops a pawn of that side in that square from being a
+passed pawn.
+
+"""
+
+FILE_MASKS = [FILE_A << column for column in range(8)]
+ADJACENT_FILE_MASKS = [(FILE_MASKS[column - 1] if column > 0 else 0) | (FILE_MASKS[column + 1] if column < 7 else 0)
+                       for column in range(8)]
+PASSED_PAWN_MASKS = get_passed_pawn_masks()
+
+
+
+##### CLASSES #####
+
+class TranspositionTable:
+    """Class for a transposition table with a fixed size in memory.
+
+    The table is a preallocated bytearray of buckets of two entries. The first
+    entry of a bucket keeps the deepest search of its positions (it is only
+    replaced by a search as deep, or by one of a newer search), and the second
+    entry is always replaced by the positions that do not fit in the first.
+    The table counts its probes, hits, stores and collisions (stores that
+    replace an entry of another position).
+    """
+    def __init__(self, megabytes=16):
+        """Construction of a transposition table instance of a given size in megabytes."""
+        buckets = max(1, megabytes * 2 ** 20 // (ENTRY.size * BUCKET_SIZE))
+        self.buckets = 1 << buckets.bit_length() - 1
+        self.data = bytearray(self.buckets * BUCKET_SIZE * ENTRY.size)
+        self.generation = 0
+        self.used = 0
+        self.reset_stats()
+
+    def __repr__(self):
+        """Representation of a transposition table instance."""
+        return f"TranspositionTable({len(self.data) // 2 ** 20} MB, {self.buckets * BUCKET_SIZE} entries)"
+
+    def reset_stats(self):
+        """Set the counters of the table to zero."""
+        self.probes = self.hits = self.stores = self.collisions = 0
+
+    def clear(self):
+        """Empty every entry of the table."""
+        self.data[:] = bytes(len(self.data))
+        self.generation = self.used = 0
+        self.reset_stats()
+
+    def new_search(self):
+        """Start a new search, so the entries of the previous ones can be replaced."""
+        self.generation = (self.generation + 1) & 255
+
+    def probe(self, key):
+        """Return the move, score, depth and bound stored for a Zobrist key, or 'None' if there is none."""
+        self.probes += 1
+        offset = (key & self.buckets - 1) * BUCKET_SIZE * ENTRY.size
+        for _ in range(BUCKET_SIZE):
+            entry_key, move, score, depth, bound, _ = ENTRY.unpack_from(self.data, offset)
+            if entry_key == key and bound != EMPTY:
+                self.hits += 1
+                return move, score, depth, bound
+            offset += ENTRY.size
+        return None
+
+    def store(self, key, depth, bound, score, move=0):
+        """Store the result of the search of a position in its bucket."""
+        self.stores += 1
+        offset = (key & self.buckets - 1) * BUCKET_SIZE * ENTRY.size
+        entry_key, _, _, entry_depth, entry_bound, generation = ENTRY.unpack_from(self.data, offset)
+        if entry_bound != EMPTY and entry_key != key and depth < entry_depth and generation == self.generation:
+            offset += ENTRY.size
+            entry_key, _, _, _, entry_bound, _ = ENTRY.unpack_from(self.data, offset)
+        if entry_bound == EMPTY:
+            self.used += 1
+        elif entry_key != key:
+            self.collisions += 1
+        elif not move:
+            move = ENTRY.unpack_from(self.data, offset)[1]
+        ENTRY.pack_into(self.data, offset, key, move, score, depth, bound, self.generation)
+
+    def get_stats(self):
+        """Return a dictionary with the counters of the table, its hit rate and the fraction of entries in use."""
+        return {"probes": self.probes,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.probes if self.probes else 0.0,
+                "stores": self.stores,
+                "collisions": self.collisions,
+                "fill": self.used / (self.buckets * BUCKET_SIZE)}
+
+
+class SharedHashTable:
+    """Class for a hash table in a block of shared memory, which processes attach to by its name.
+
+    The table is created by one process with a size in megabytes and the
+    binary format of the data of its entries (a multiple of 8 bytes), and the
+    other processes attach to it by the name of its block ('name'). Its
+    entries are read and written without locks, and each one is verified by
+    its checksum when it is read. The header of the block keeps the number of
+    entries and a generation, which only the process that created the table
+    changes. A data format whose size is not a multiple of 8 bytes raises a
+    'ValueError'.
+    """
+    def __init__(self, data_format, megabytes=16, name=None):
+        """Construction of a shared hash table instance with entries of a given data format and a size in megabytes, or attached to the block of a given name."""
+        if data_format.size % 8:
+            raise ValueError(f"the data format of a shared hash table has {data_format.size} bytes, not a multiple of 8")
+        self.data_format = data_format
+        self.words = Struct(f"<{data_format.size // 8 + 1}Q")
+        self.entry_size = self.words.size
+        if name is None:
+            entries = max(1, megabytes * 2 ** 20 // self.entry_size)
+            entries = 1 << entries.bit_length() - 1
+            self.memory = SharedMemory(create=True, size=SHARED_HEADER.size + entries * self.entry_size)
+            SHARED_HEADER.pack_into(self.memory.buf, 0, entries, 0)
+        else:
+            self.memory = SharedMemory(name)
+        self.owner = name is None
+        self.name = self.memory.name
+        self.entries = SHARED_HEADER.unpack_from(self.memory.buf)[0]
+        self.data = self.memory.buf[SHARED_HEADER.size:SHARED_HEADER.size + self.entries * self.entry_size]
+
+    def __repr__(self):
+        """Representation of a shared hash table instance."""
+        return f"SharedHashTable('{self.name}', {self.entries} entries)"
+
+    def close(self):
+        """Detach the table from its block of shared memory, which is also removed if this process created it."""
+        self.data.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+    def clear(self):
+        """Empty every entry of the table and set its generation to 0."""
+        self.data[:] = bytes(len(self.data))
+        SHARED_HEADER.pack_into(self.memory.buf, 0, self.entries, 0)
+
+    def get_generation(self):
+        """Return the generation kept in the header of the table."""
+        return SHARED_HEADER.unpack_from(self.memory.buf)[1]
+
+    def set_generation(self, generation):
+        """Keep a generation in the header of the table, if this process created it."""
+        if self.owner:
+            SHARED_HEADER.pack_into(self.memory.buf, 0, self.entries, generation)
+
+    def read(self, index):
+        """Return the key and the data of the entry of a given index, or a key of 0 if the entry does not pass its checksum."""
+        offset = index * self.entry_size
+        entry = self.data[offset:offset + self.entry_size].tobytes()
+        key = 0
+        for word in self.words.unpack(entry):
+            key ^= word
+        return key, self.data_format.unpack_from(entry, CHECKSUM.size)
+
+    def write(self, index, key, *data):
+        """Write the key and the data of the entry of a given index."""
+        offset = index * self.entry_size
+        data = self.data_format.pack(*data)
+        for word in self.words.unpack(bytes(CHECKSUM.size) + data):
+            key ^= word
+        self.data[offset + CHECKSUM.size:offset + self.entry_size] = data
+        CHECKSUM.pack_into(self.data, offset, key)
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """Class for a transposition table in a shared hash table, which the processes of a parallel search share.
+
+    The table is created by the main process with a size in megabytes, and
+    the worker processes attach to it by its name ('name'). The entries are
+    kept in buckets as in the transposition table. The search generation is
+    kept in the header of the shared table. The counters of the table are the
+    ones of each process.
+    """
+    def __init__(self, megabytes=16, name=None):
+        """Construction of a shared transposition table instance of a given size in megabytes, or attached to the one of a given name."""
+        self.shared = SharedHashTable(SHARED_ENTRY_DATA, megabytes, name)
+        self.name = self.shared.name
+        self.buckets = self.shared.entries // BUCKET_SIZE or 1
+        self.generation = self.shared.get_generation()
+        self.used = 0
+        self.reset_stats()
+
+    def __repr__(self):
+        """Representation of a shared transposition table instance."""
+        return f"SharedTranspositionTable('{self.name}', {self.shared.entries} entries)"
+
+    def close(self):
+        """Detach the table from its shared memory, which is also removed if this process created it."""
+        self.shared.close()
+
+    def clear(self):
+        """Empty every entry of the table."""
+        self.shared.clear()
+        self.generation = self.used = 0
+        self.reset_stats()
+
+    def new_search(self):
+        """Start a new search, so the entries of the previous ones can be replaced."""
+        self.shared.set_generation((self.generation + 1) & 255)
+        self.generation = self.shared.get_generation()
+
+    def probe(self, key):
+        """Return the move, score, depth and bound stored for a Zobrist key, or 'None' if there is none."""
+        self.probes += 1
+        index = (key & self.buckets - 1) * BUCKET_SIZE
+        for index in range(index, index + BUCKET_SIZE):
+            entry_key, (move, score, depth, bound, _) = self.shared.read(index)
+            if entry_key == key and bound != EMPTY:
+                self.hits += 1
+                return move, score, depth, bound
+        return None
+
+    def store(self, key, depth, bound, score, move=0):
+        """Store the result of the search of a position in its bucket."""
+        self.stores += 1
+        index = (key & self.buckets - 1) * BUCKET_SIZE
+        entry_key, (entry_move, _, entry_depth, entry_bound, generation) = self.shared.read(index)
+        if entry_bound != EMPTY and entry_key != key and depth < entry_depth and generation == self.generation:
+            index += 1
+            entry_key, (entry_move, _, _, entry_bound, _) = self.shared.read(index)
+        if entry_bound == EMPTY:
+            self.used += 1
+        elif entry_key != key:
+            self.collisions += 1
+        elif not move:
+            move = entry_move
+        self.shared.write(index, key, move, score, depth, bound, self.generation)
+
+
+class PawnHashTable:
+    """Class for a pawn hash table with a fixed size in memory.
+
+    The table is a preallocated bytearray of entries, each one with the
+    scores and the passed pawns of a pawn structure, found by the key of the
+    pawns. A new structure always replaces the one in its entry. The table
+    counts its probes and hits.
+    """
+    def __init__(self, megabytes=1):
+        """Construction of a pawn hash table instance of a given size in megabytes."""
+        entries = max(1, megabytes * 2 ** 20 // PAWN_ENTRY.size)
+        self.entries = 1 << entries.bit_length() - 1
+        self.data = bytearray(self.entries * PAWN_ENTRY.size)
+        self.probes = self.hits = 0
+
+    def __repr__(self):
+        """Representation of a pawn hash table instance."""
+        return f"PawnHashTable({len(self.data) // 2 ** 20} MB, {self.entries} entries)"
+
+    def probe(self, key, white_pawns, black_pawns):
+        """Return the middlegame and endgame scores and the passed pawns of a pawn structure, from the table or evaluated and stored in it."""
+        self.probes += 1
+        offset = (key & self.entries - 1) * PAWN_ENTRY.size
+        entry_key, white_passed, black_passed, midgame, endgame, used = PAWN_ENTRY.unpack_from(self.data, offset)
+        if used and entry_key == key:
+            self.hits += 1
+            return midgame, endgame, (white_passed, black_passed)
+        midgame, endgame, passed_pawns = evaluate_pawns(white_pawns, black_pawns)
+        PAWN_ENTRY.pack_into(self.data, offset, key, passed_pawns[0], passed_pawns[1], midgame, endgame, 1)
+        return midgame, endgame, passed_pawns
+
+    def get_stats(self):
+        """Return a dictionary with the counters of the table and its hit rate."""
+        return {"probes": self.probes,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.probes if self.probes else 0.0}
+
+
+class Engine:
+    """Class for the search of the best move of a position.
+
+    The engine keeps a transposition table between searches, so a search
+    starts with what was learned in the previous ones. The principal variation
+    of each ply is kept in 'pv', and the Zobrist keys of the positions from the
+    start of the game in 'keys', to score the repetitions as draws.
+
+    The evaluation of the pawn structures is kept in a pawn hash table
+    ('pawn_table'). The null move pruning, the late move reductions, the
+    futility pruning, the principal variation search and the aspiration
+    windows can be turned off to compare the search without them.
+
+    The quiet moves that cause a cutoff are kept as the killer moves of their
+    ply ('killers') and add to the history score of their piece and square
+    ('history_scores'), so they are searched earlier in the other nodes. The
+    engine counts the cutoffs and those caused by the first move searched.
+
+    In a parallel search, the engine of each worker process is given the
+    shared transposition table and the event that stops the search
+    ('stop_event'). The helper workers ('worker' is not 0) add random history
+    scores to the quiet moves, and the odd ones only search the even depths,
+    so they do not repeat the search of the others.
+
+    While the opponent thinks its move, the engine can ponder: search the
+    position after the expected move in a background thread ('ponder'). If
+    the opponent plays it, the search goes on until the time of the move and
+    its result is used ('ponder_hit'); otherwise it is stopped and discarded
+    ('stop_ponder'). The engine must not be used by another search while it
+    ponders.
+    """
+    def __init__(self, megabytes=16, pawn_megabytes=1, null_move=True, late_move_reductions=True,
+                 futility_pruning=True, principal_variation_search=True, aspiration_windows=True, table=None,
+                 stop_event=None):
+        """Construction of an engine instance with a transposition table and a pawn hash table of given sizes in megabytes, or a given table."""
+        self.table = TranspositionTable(megabytes) if table is None else table
+        self.pawn_table = PawnHashTable(pawn_megabytes)
+        self.stop_event = stop_event
+        self.worker = 0
+        self.ponder_thread = self.ponder_result = self.ponder_stop_event = None
+        self.ponder_start = 0.0
+        self.null_move = null_move
+        self.late_move_reductions = late_move_reductions
+        self.futility_pruning = futility_pruning
+        self.principal_variation_search = principal_variation_search
+        self.aspiration_windows = aspiration_windows
+        self.keys = []
+        self.pv = [[] for _ in range(MAX_PLY + 1)]
+        self.killers = [[0] * KILLERS for _ in range(MAX_PLY + 1)]
+        self.history_scores = [[0] * 64 for _ in range(12)]
+        self.nodes = self.cutoffs = self.first_move_cutoffs = 0
+        self.max_nodes = self.deadline = float("inf")
+        self.stopped = False
+
+    def search(self, position, depth=MAX_PLY, nodes=None, movetime=None, time_left=None, increment=0.0,
+               moves_to_go=None, history=(), verbose=False):
+        """Search the best move of a position and return a dictionary with the result.
+
+        The search is repeated one ply deeper each time, up to a given depth,
+        and stops when a number of nodes is reached or when its time is over.
+        The time is given for the move ('movetime', in seconds) or by the clock
+        of the game ('time_left', 'increment' and 'moves_to_go'), or both. The
+        result is the one of the deepest completed search: its best move,
+        score, depth and principal variation, with the nodes, time and nodes
+        per second of the whole search, and a list with the depth, score,
+        nodes and re-searches of each completed iteration ('iterations'): the
+        re-searches of the root after the score fell out of its aspiration
+        window ('aspiration_researches') and those of the moves after their
+        zero window search of the principal variation search raised alpha
+        ('pvs_researches'). 'history' gives
+        the Zobrist keys of the previous positions of the game. If no search
+        is completed, the best move is the best one of the root found so far,
+        or else the move of the transposition table, or else any legal move.
+        """
+        start = perf_counter()
+        budget = movetime
+        if time_left is not None:
+            game_budget = get_move_time(time_left, increment, moves_to_go)
+            budget = game_budget if budget is None else min(budget, game_budget)
+        self.keys = list(history)
+        self.nodes = self.cutoffs = self.first_move_cutoffs = self.pvs_researches = 0
+        self.stopped = False
+        self.killers = [[0] * KILLERS for _ in range(MAX_PLY + 1)]
+        self.pv[0] = []
+        for scores in self.history_scores:
+            scores[:] = [score // 2 for score in scores]
+        if self.worker:
+            random = Random(self.worker)
+            for scores in self.history_scores:
+                scores[:] = [score + random.randrange(HISTORY_NOISE) for score in scores]
+        self.max_nodes = float("inf") if nodes is None else nodes
+        self.deadline = float("inf") if budget is None else start + budget
+        self.table.new_search()
+        result = {"move": None, "score": 0, "depth": 0, "pv": [], "iterations": []}
+        score = 0
+        for iteration in range(1, min(depth, MAX_PLY) + 1):
+            if self.worker & 1 and iteration & 1 and iteration < min(depth, MAX_PLY):
+                continue
+            iteration_nodes, pvs_researches = self.nodes, self.pvs_researches
+            score, aspiration_researches = self.search_root(position, iteration, score)
+            if self.stopped:
+                break
+            result.update(move=self.pv[0][0] if self.pv[0] else None, score=score, depth=iteration, pv=self.pv[0][:])
+            result["iterations"].append({"depth": iteration, "score": score, "nodes": self.nodes - iteration_nodes,
+                                         "aspiration_researches": aspiration_researches,
+                                         "pvs_researches": self.pvs_researches - pvs_researches})
+            if verbose:
+                elapsed = perf_counter() - start
+                print(f"depth {iteration} score {score} nodes {self.nodes} time {elapsed:.2f} "
+                      f"nps {self.nodes / elapsed if elapsed else 0:.0f} cutoffs {self.get_cutoff_rate():.1%} "
+                      f"iteration nodes {self.nodes - iteration_nodes} "
+                      f"researches {aspiration_researches}/{self.pvs_researches - pvs_researches} "
+                      f"pv {get_pv_names(result['pv'])}")
+            if abs(score) > MATE - MAX_PLY or not self.pv[0]:
+                break
+            if budget is not None and perf_counter() - start > budget * SOFT_TIME_SHARE:
+                break
+        if result["move"] is None:
+            moves = position.legal_moves()
+            entry = self.table.probe(position.key)
+            if self.pv[0] and self.pv[0][0] in moves:
+                result.update(move=self.pv[0][0], pv=self.pv[0][:])
+            elif entry and entry[0] in moves:
+                result.update(move=entry[0], pv=[entry[0]])
+            else:
+                result["move"] = moves[0] if moves else None
+        elapsed = perf_counter() - start
+        result.update(nodes=self.nodes, time=elapsed, nps=self.nodes / elapsed if elapsed else 0.0,
+                      cutoff_rate=self.get_cutoff_rate())
+        return result
+
+    def search_root(self, position, depth, previous_score):
+        """Return the score of a position searched to a given depth and the number of re-searches of its aspiration window.
+
+        The window is centered on the score of the previous iteration. When
+        the score falls out of it, the side it fell out of is widened and the
+        root is searched again, until the score is within the window.
+        """
+        if not self.aspiration_windows or depth < ASPIRATION_DEPTH or abs(previous_score) > MATE - MAX_PLY:
+            return self.negamax(position, depth, -INFINITE, INFINITE, 0), 0
+        margin = ASPIRATION_WINDOW
+        alpha, beta = previous_score - margin, previous_score + margin
+        researches = 0
+        while True:
+            score = self.negamax(position, depth, alpha, beta, 0)
+            if self.stopped or alpha < score < beta:
+                return score, researches
+            if score <= alpha:
+                alpha = max(score - margin, -INFINITE)
+            else:
+                beta = min(score + margin, INFINITE)
+            margin *= 2
+            researches += 1
+
+    def is_time_over(self):
+        """Return 'True' if the time of the search is over or it was stopped by another process or thread."""
+        return perf_counter() >= self.deadline or self.stop_event is not None and self.stop_event.is_set()
+
+    def get_ponder_move(self, position, result):
+        """Return the expected reply to the best move of the result of a search of a position, or 'None' if there is none.
+
+        The reply is the second move of the principal variation or, when the
+        variation was cut by the transposition table, the move stored in the
+        table for the position after the best move.
+        """
+        if len(result["pv"]) > 1:
+            return result["pv"][1]
+        if result["move"] is None:
+            return None
+        undo = position.make_move(result["move"])
+        entry = self.table.probe(position.key)
+        moves = position.legal_moves()
+        position.unmake_move(undo)
+        return entry[0] if entry and entry[0] in moves else None
+
+    def ponder(self, position, history=()):
+        """Start the search of a position in a background thread, with no limits until it is stopped."""
+        self.ponder_start = perf_counter()
+        self.ponder_result = None
+        self.ponder_stop_event, self.stop_event = self.stop_event, ThreadEvent()
+        self.ponder_thread = Thread(target=self.run_ponder, args=(position, history), daemon=True)
+        self.ponder_thread.start()
+
+    def run_ponder(self, position, history):
+        """Search a position in the background thread and keep its result."""
+        self.ponder_result = self.search(position, history=history)
+
+    def is_pondering(self):
+        """Return 'True' if the engine is pondering."""
+        return self.ponder_thread is not None
+
+    def ponder_hit(self, movetime):
+        """Return the result of the pondering once a given time in seconds has passed since it started.
+
+        As the opponent played the expected move, the time it took to play it
+        counts as the time of the search, so the result is returned at once
+        when the opponent took longer than the time of the move.
+        """
+        self.ponder_thread.join(max(0.0, self.ponder_start + movetime - perf_counter()))
+        return self.stop_ponder()
+
+    def stop_ponder(self):
+        """Stop the pondering and return its result, or 'None' if the engine was not pondering."""
+        if self.ponder_thread is None:
+            return None
+        self.stop_event.set()
+        self.ponder_thread.join()
+        self.stop_event, self.ponder_thread = self.ponder_stop_event, None
+        return self.ponder_result
+
+    def get_cutoff_rate(self):
+        """Return the fraction of the cutoffs of the search caused by the first move searched."""
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def pick_moves(self, position, moves, hash_move, ply):
+        """Yield the moves of a position in the order they are searched.
+
+        The hash move comes first, then the captures and promotions by their
+        MVV-LVA score, the killer moves of the ply and the other quiet moves by
+        their history score. The captures that lose material in the static
+        exchange evaluation are left for the end. Each stage is only sorted
+        when it is reached.
+        """
+        if hash_move in moves:
+            yield hash_move
+        captures, quiets, losing_captures = [], [], []
+        for move in moves:
+            if move != hash_move:
+                capture_score = get_capture_score(position, move)
+                if capture_score is None:
+                    quiets.append(move)
+                else:
+                    captures.append((capture_score, move))
+        captures.sort(reverse=True)
+        for _, move in captures:
+            if move >> 12 or static_exchange(position, move) >= 0:
+                yield move
+            else:
+                losing_captures.append(move)
+        for killer in self.killers[ply]:
+            if killer in quiets:
+                quiets.remove(killer)
+                yield killer
+        squares, history_scores = position.squares, self.history_scores
+        quiets.sort(key=lambda move: history_scores[squares[move & 63]][move >> 6 & 63], reverse=True)
+        yield from quiets
+        yield from losing_captures
+
+    def add_cutoff(self, position, move, depth, ply):
+        """Keep a quiet move that caused a cutoff as a killer move of its ply and add to its history score."""
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1:] = killers[:-1]
+            killers[0] = move
+        self.history_scores[position.squares[move & 63]][move >> 6 & 63] += depth * depth
+
+    def is_draw(self, position):
+        """Return 'True' if a position is a draw by the fifty moves rule or by a repetition in the search or the game."""
+        if position.halfmove >= 100:
+            return True
+        keys = self.keys
+        for i in range(len(keys) - 2, max(len(keys) - position.halfmove, 0) - 1, -2):
+            if keys[i] == position.key:
+                return True
+        return False
+
+    def negamax(self, position, depth, alpha, beta, ply, null_move=True):
+        """Return the score of a position for the side to move, searched to a given depth within an alpha-beta window.
+
+        Below the root, when the side to move is not in check, a node whose
+        evaluation is over beta is pruned with a null move (unless 'null_move'
+        is 'False'), its late quiet moves are searched with less depth, and
+        the quiet moves of a frontier node are not searched when its
+        evaluation is too far below alpha.
+        """
+        self.nodes += 1
+        if self.nodes >= self.max_nodes or not self.nodes & CLOCK_INTERVAL - 1 and self.is_time_over():
+            self.stopped = True
+            return 0
+        self.pv[ply] = []
+        if ply and self.is_draw(position):
+            return 0
+        if depth <= 0 or ply >= MAX_PLY:
+            return self.quiescence(position, alpha, beta, ply)
+
+        hash_move = 0
+        entry = self.table.probe(position.key)
+        if entry:
+            hash_move, score, entry_depth, bound = entry
+            if ply and entry_depth >= depth:
+                if score > MATE - MAX_PLY:
+                    score -= ply
+                elif score < MAX_PLY - MATE:
+                    score += ply
+                if bound == EXACT or bound == LOWER and score >= beta or bound == UPPER and score <= alpha:
+                    return score
+
+        moves = position.legal_moves()
+        in_check = position.in_check()
+        if not moves:
+            return ply - MATE if in_check else 0
+        selective = ply and not in_check
+        static_score = evaluate(position, self.pawn_table) if selective else None
+
+        self.keys.append(position.key)
+        if selective and self.null_move and null_move and depth >= NULL_MOVE_DEPTH and static_score >= beta > MAX_PLY - MATE and \
+           position.occupancy[position.side] & ~position.bitboards[position.side * 6 + PAWN] & ~position.bitboards[position.side * 6 + KING]:
+            undo = position.make_null_move()
+            score = -self.negamax(position, depth - 1 - NULL_MOVE_REDUCTION, -beta, 1 - beta, ply + 1, False)
+            position.unmake_null_move(undo)
+            if score >= beta or self.stopped:
+                self.keys.pop()
+                if not self.stopped and position.phase <= VERIFICATION_PHASE:
+                    score = self.negamax(position, depth - NULL_MOVE_REDUCTION, beta - 1, beta, ply, False)
+                if self.stopped:
+                    return 0
+                if score >= beta:
+                    return beta if score > MATE - MAX_PLY else score
+                self.keys.append(position.key)
+        futile = selective and self.futility_pruning and depth < len(FUTILITY_MARGINS) and \
+                 static_score + FUTILITY_MARGINS[depth] <= alpha < MATE - MAX_PLY
+
+        original_alpha, best_score, best_move = alpha, -INFINITE, 0
+        for i, move in enumerate(self.pick_moves(position, moves, hash_move, ply)):
+            quiet = get_capture_score(position, move) is None
+            undo = position.make_move(move)
+            late = quiet and i >= LATE_MOVE_NUMBER and not position.in_check() and move not in self.killers[ply]
+            if futile and late:
+                position.unmake_move(undo)
+                best_score = max(best_score, static_score + FUTILITY_MARGINS[depth])
+                continue
+            reduction = LATE_MOVE_REDUCTION if selective and self.late_move_reductions and late and \
+                                               depth >= LATE_MOVE_DEPTH else 0
+            if i and (reduction or self.principal_variation_search):
+                score = -self.negamax(position, depth - 1 - reduction, -alpha - 1, -alpha, ply + 1)
+                if reduction and score > alpha and not self.stopped:
+                    reduction = 0
+                    score = -self.negamax(position, depth - 1, -alpha - 1, -alpha, ply + 1)
+                if alpha < score < beta and not self.stopped:
+                    self.pvs_researches += self.principal_variation_search
+                    score = -self.negamax(position, depth - 1, -beta, -alpha, ply + 1)
+            else:
+                score = -self.negamax(position, depth - 1, -beta, -alpha, ply + 1)
+            position.unmake_move(undo)
+            if self.stopped:
+                self.keys.pop()
+                return 0
+            if score > best_score:
+                best_score, best_move = score, move
+                if score > alpha:
+                    alpha = score
+                    self.pv[ply] = [move] + self.pv[ply + 1]
+                    if score >= beta:
+                        self.cutoffs += 1
+                        self.first_move_cutoffs += i == 0
+                        if get_capture_score(position, move) is None:
+                            self.add_cutoff(position, move, depth, ply)
+                        break
+        self.keys.pop()
+
+        bound = LOWER if best_score >= beta else EXACT if best_score > original_alpha else UPPER
+        stored_score = best_score
+        if stored_score > MATE - MAX_PLY:
+            stored_score += ply
+        elif stored_score < MAX_PLY - MATE:
+            stored_score -= ply
+        self.table.store(position.key, depth, bound, stored_score, best_move)
+        return best_score
+
+    def quiescence(self, position, alpha, beta, ply):
+        """Return the score of a position for the side to move, searching only its captures and promotions until it is quiet.
+
+        The side to move can stand with the evaluation of the position instead
+        of capturing, unless it is in check, when every move is searched. The
+        captures which cannot raise the score over alpha (delta pruning) or
+        which lose material in the static exchange evaluation are not searched.
+        """
+        self.nodes += 1
+        if self.nodes >= self.max_nodes or not self.nodes & CLOCK_INTERVAL - 1 and self.is_time_over():
+            self.stopped = True
+            return 0
+        if ply >= MAX_PLY:
+            return evaluate(position, self.pawn_table)
+        in_check = position.in_check()
+        if in_check:
+            moves = position.legal_moves()
+            if not moves:
+                return ply - MATE
+            best_score = -INFINITE
+        else:
+            best_score = evaluate(position, self.pawn_table)
+            if best_score >= beta:
+                return best_score
+            alpha = max(alpha, best_score)
+            moves = position.legal_moves(captures=True)
+
+        scored_moves = sorted(((get_capture_score(position, move) or 0, move) for move in moves), reverse=True)
+        for capture_score, move in scored_moves:
+            if not in_check:
+                if best_score + (capture_score >> 3) + DELTA_MARGIN <= alpha:
+                    continue
+                if not move >> 12 and static_exchange(position, move) < 0:
+                    continue
+            undo = position.make_move(move)
+            score = -self.quiescence(position, -beta, -alpha, ply + 1)
+            position.unmake_move(undo)
+            if self.stopped:
+                return 0
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if score >= beta:
+                        break
+        return best_score
+
+
+
+class ParallelEngine:
+    """Class for the parallel search (Lazy SMP) of the best move of a position with a pool of worker processes.
+
+    Every worker searches the same position with its own engine, which is
+    kept between searches, and they all share a transposition table in
+    shared memory, so each one finds the positions searched by the others.
+    The workers differ in the depths and the order of the moves they search.
+    The search ends when the main worker (0) ends it, and its result is the
+    one of the deepest search completed by any worker. The pool and the table
+    are released with 'close'. The selective search options are the ones of
+    'Engine', given to the engine of every worker. A parallel engine does not
+    ponder, so it is used from the command line and the benchmarks, and the
+    application plays with 'Engine'.
+    """
+    def __init__(self, workers=None, megabytes=16, pawn_megabytes=1, null_move=True, late_move_reductions=True,
+                 futility_pruning=True, principal_variation_search=True, aspiration_windows=True):
+        """Construction of a parallel engine instance with a number of worker processes (all the CPUs of the machine by default) and a shared transposition table of a given size in megabytes."""
+        self.workers = workers or cpu_count()
+        self.table = SharedTranspositionTable(megabytes)
+        self.stop_event = Event()
+        options = {"pawn_megabytes": pawn_megabytes, "null_move": null_move, "late_move_reductions": late_move_reductions,
+                   "futility_pruning": futility_pruning, "principal_variation_search": principal_variation_search,
+                   "aspiration_windows": aspiration_windows}
+        self.executor = ProcessPoolExecutor(self.workers, initializer=start_worker,
+                                            initargs=(self.table.name, self.stop_event, options))
+
+    def __repr__(self):
+        """Representation of a parallel engine instance."""
+        return f"ParallelEngine({self.workers} workers, {self.table})"
+
+    def close(self):
+        """Stop the worker processes and remove the shared transposition table."""
+        self.executor.shutdown()
+        self.table.close()
+
+    def search(self, position, depth=MAX_PLY, nodes=None, movetime=None, time_left=None, increment=0.0,
+               moves_to_go=None, history=(), verbose=False):
+        """Search the best move of a position with every worker and return a dictionary with the result.
+
+        The limits are the ones of 'Engine.search', and 'nodes' limits the
+        nodes of each worker. The result is the one of the worker with the
+        deepest completed search, with the nodes of all the workers, the
+        number of the worker ('worker') and the depth completed by each one
+        ('depths'). Only the main worker prints its iterations.
+        """
+        start = perf_counter()
+        self.stop_event.clear()
+        self.table.new_search()
+        fen = position.to_fen()
+        limits = {"depth": depth, "nodes": nodes, "movetime": movetime, "time_left": time_left,
+                  "increment": increment, "moves_to_go": moves_to_go, "history": tuple(history)}
+        futures = [self.executor.submit(search_worker, fen, worker, dict(limits, verbose=verbose and not worker))
+                   for worker in range(self.workers)]
+        futures[0].result()
+        self.stop_event.set()
+        results = [future.result() for future in futures]
+        worker = max(range(self.workers), key=lambda worker: (results[worker]["depth"], -worker))
+        result = dict(results[worker])
+        elapsed = perf_counter() - start
+        total_nodes = sum(worker_result["nodes"] for worker_result in results)
+        result.update(nodes=total_nodes, time=elapsed, nps=total_nodes / elapsed if elapsed else 0.0, worker=worker,
+                      depths=[worker_result["depth"] for worker_result in results])
+        return result
+
+
+
+##### EXECUTABLE #####
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Search the best move of a position with the engine of 'Chess Masters'.")
+    parser.add_argument("fen", nargs="?", default="rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+                        help="the FEN of the position (the starting position by default)")
+    parser.add_argument("--depth", type=int, default=5, help="the depth of the search (5 by default)")
+    parser.add_argument("--nodes", type=int, help="the maximum number of nodes of the search")
+    parser.add_argument("--movetime", type=float, help="the maximum time of the search in seconds")
+    parser.add_argument("--time", type=float, help="the time left in the clock of the game in seconds")
+    parser.add_argument("--inc", type=float, default=0.0, help="the increment of the clock per move in seconds")
+    parser.add_argument("--hash", type=int, default=16, help="the size of the transposition table in megabytes (16 by default)")
+    parser.add_argument("--no-null-move", action="store_true", help="turn off the null move pruning")
+    parser.add_argument("--no-reductions", action="store_true", help="turn off the late move reductions")
+    parser.add_argument("--no-futility", action="store_true", help="turn off the futility pruning")
+    parser.add_argument("--no-pvs", action="store_true", help="turn off the principal variation search")
+    parser.add_argument("--no-aspiration", action="store_true", help="turn off the aspiration windows")
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"the number of processes of a parallel search (1 by default, {cpu_count()} CPUs here)")
+    arguments = parser.parse_args()
+
+    options = {"null_move": not arguments.no_null_move, "late_move_reductions": not arguments.no_reductions,
+               "futility_pruning": not arguments.no_futility, "principal_variation_search": not arguments.no_pvs,
+               "aspiration_windows": not arguments.no_aspiration}
+    if arguments.workers > 1:
+        engine = ParallelEngine(arguments.workers, arguments.hash, **options)
+    else:
+        engine = Engine(arguments.hash, **options)
+    result = engine.search(BitboardPosition.from_fen(arguments.fen), arguments.depth, arguments.nodes,
+                           arguments.movetime, arguments.time, arguments.inc, verbose=True)
+    print(f"bestmove {get_move_name(result['move']) if result['move'] is not None else '(none)'}")
+    print(f"{result['nodes']} nodes in {result['time']:.2f} s, {result['nps']:.0f} nodes per second.")
+    if arguments.workers > 1:
+        print(f"Depth completed by each worker: {result['depths']} (result of worker {result['worker']})")
+        engine.close()
+    else:
+        print(f"Transposition table: {engine.table.get_stats()}")
+        print(f"Pawn hash table: {engine.pawn_table.get_stats()}")
@@ -0,0 +1,336 @@
+"""Perft module.
+
+This module measures the speed and the exactness of the move generators in
+the Rules module by counting the positions of their move trees ('perft').
+
+The module includes:
+
+    - The reference positions, with their published perft node counts.
+    - Functions that count the nodes of the move tree of a position, in total
+      ('perft') or for each first move ('divide'), with the bitboards or with
+      the list of pieces.
+    - A function that splits the first moves of a position across a pool of
+      processes and adds up their node counts ('parallel_perft').
+    - A table of node counts in shared memory, so the processes do not count
+      again the subtrees of the positions counted by the others.
+    - A function that walks a move tree with both representations to check
+      that their allowed movements agree.
+    - The executable part of the code when the module is open as a script,
+      which runs the reference suite and reports the nodes per second.
+
+Perft module is not part of the application. It is the gate that every change
+in the move generation must pass.
+
+"""
+
+
+
+##### IMPORTS #####
+
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count
+from struct import Struct
+from sys import exit
+from time import perf_counter
+
+from rules import *
+from engine import SharedHashTable
+
+
+
+##### CONSTANTS #####
+
+"""
+The constant 'REFERENCE_POSITIONS' is a list with the well-known perft test
+positions: their name, their FEN and their published node counts from depth 1.
+
+The list of pieces does not play en passant captures and always promotes to a
+queen, so its node counts only match the published ones for the depths
+without those moves. 'PIECES_DEPTHS' gives, for each reference position, the
+depths at which they can be compared.
+
+"""
+
+REFERENCE_POSITIONS = [
+    ("Start position",
+     "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+     [20, 400, 8902, 197281, 4865609]),
+    ("Kiwipete",
+     "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("Position 3",
+     "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624]),
+    ("Position 4",
+     "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("Position 5",
+     "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487]),
+    ("Position 6",
+     "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594]),
+]
+
+PIECES_DEPTHS = {"Start position": 4, "Kiwipete": 1, "Position 3": 2,
+                 "Position 4": 1, "Position 5": 0, "Position 6": 3}
+
+
+"""
+The constant 'PERFT_ENTRY_DATA' is the binary format of the data of an entry
+of the table of node counts: the node count (8 bytes) and the depth (1 byte),
+padded to 16 bytes.
+
+"""
+
+PERFT_ENTRY_DATA = Struct("<QB7x")
+
+
+
+##### FUNCTIONS: PERFT #####
+
+def perft(position, depth, table=None):
+    """Return the number of positions at a given depth of the move tree of a bitboard position, with an optional table of node counts."""
+    if table is not None and depth > 1:
+        nodes = table.probe(position.key, depth)
+        if nodes is not None:
+            return nodes
+    moves = position.legal_moves()
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    nodes = 0
+    for move in moves:
+        undo = position.make_move(move)
+        nodes += perft(position, depth - 1, table)
+        position.unmake_move(undo)
+    if table is not None:
+        table.store(position.key, depth, nodes)
+    return nodes
+
+
+def divide(position, depth):
+    """Return a dictionary with the perft node count below each legal move of a bitboard position."""
+    counts = {}
+    for move in position.legal_moves():
+        undo = position.make_move(move)
+        counts[get_move_name(move)] = perft(position, depth - 1)
+        position.unmake_move(undo)
+    return counts
+
+
+def perft_pieces(pieces, color, depth):
+    """Return the number of positions at a given depth of the move tree of a list of pieces."""
+    movements = check_allowed_movements(color, pieces) + castling_movements(color, pieces)
+    if depth <= 1:
+        return len(movements) if depth == 1 else 1
+    other = "b" if color == "w" else "w"
+    nodes = 0
+    for movement in movements:
+        undo = make_move(movement, pieces)
+        nodes += perft_pieces(pieces, other, depth - 1)
+        unmake_move(undo, pieces)
+    return nodes
+
+
+def count_nodes(fen, depth, engine="bitboards", table_name=None):
+    """Return the perft node count of the position of a given FEN, with the bitboards or with the list of pieces.
+
+    With the bitboards, the node counts are kept in the table of node counts
+    of a given name, if there is one.
+    """
+    position = BitboardPosition.from_fen(fen)
+    if engine == "pieces":
+        return perft_pieces(position.to_pieces(), position.color, depth)
+    if table_name is None:
+        return perft(position, depth)
+    table = PerftTable(name=table_name)
+    nodes = perft(position, depth, table)
+    table.close()
+    return nodes
+
+
+def parallel_perft(position, depth, workers=None, engine="bitboards", megabytes=0, executor=None):
+    """Return the perft node count of a bitboard position, counting the subtree of each first move in a pool of processes.
+
+    The workers receive the FEN of the position after each first move, which
+    is much smaller to send than the pieces, and their counts are added up.
+    The 'workers' argument is the number of processes (all the CPUs of the
+    machine by default). With a size in megabytes, the workers share a table
+    of node counts of that size. A pool of processes ('executor') can be
+    given, so it is started only once for many counts.
+    """
+    if depth <= 1:
+        return count_nodes(position.to_fen(), depth, engine)
+    if engine == "pieces":
+        pieces = position.to_pieces()
+        movements = check_allowed_movements(position.color, pieces) + castling_movements(position.color, pieces)
+        moves = [position.from_movement(movement) for movement in movements]
+    else:
+        moves = position.legal_moves()
+    fens = []
+    for move in moves:
+        undo = position.make_move(move)
+        fens.append(position.to_fen())
+        position.unmake_move(undo)
+    table = PerftTable(megabytes) if megabytes else None
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            nodes = sum(executor.map(count_nodes, fens, [depth - 1] * len(fens), [engine] * len(fens),
+                                     [table and table.name] * len(fens)))
+    else:
+        nodes = sum(executor.map(count_nodes, fens, [depth - 1] * len(fens), [engine] * len(fens),
+                                 [table and table.name] * len(fens)))
+    if table is not None:
+        table.close()
+    return nodes
+
+
+def is_pieces_move(position, move):
+    """Return 'True' if a bitboard move can be played with the list of pieces (it is not an en passant capture or an under-promotion)."""
+    promotion = move >> 12
+    if promotion and promotion != QUEEN:
+        return False
+    piece = position.squares[move & 63]
+    return not (piece % 6 == PAWN and move >> 6 & 63 == position.en_passant)
+
+
+def compare(position, depth):
+    """Check that the list of pieces and the bitboards allow the same movements in every node of a move tree.
+
+    Return 'None' if they agree, or the FEN of the first position where they
+    disagree with the set of the movements allowed by only one of them.
+    """
+    pieces = position.to_pieces()
+    moves = [move for move in position.legal_moves() if is_pieces_move(position, move)]
+    bitboard_movements = {position.to_movement(move) for move in moves}
+    pieces_movements = set(check_allowed_movements(position.color, pieces) + castling_movements(position.color, pieces))
+    if bitboard_movements != pieces_movements:
+        return position.to_fen(), bitboard_movements ^ pieces_movements
+    if depth > 1:
+        for move in moves:
+            undo = position.make_move(move)
+            mismatch = compare(position, depth - 1)
+            position.unmake_move(undo)
+            if mismatch:
+                return mismatch
+    return None
+
+
+def run_suite(max_nodes=100000, engine="bitboards", workers=1, megabytes=0):
+    """Run the perft of the reference positions up to a maximum number of nodes and report the results.
+
+    The 'engine' argument selects the rules which are measured: 'bitboards'
+    or 'pieces'. With more than one worker, the first moves of each position
+    are counted in parallel, in a pool of processes started once for the
+    whole suite, and each count is also timed in a single process to report
+    the speedup of the workers. With a size in megabytes, the node counts are
+    kept in a table of that size for each count. Return 'True' if every node
+    count is correct.
+    """
+    correct = True
+    total_nodes, total_time, serial_time = 0, 0.0, 0.0
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    for name, fen, counts in REFERENCE_POSITIONS:
+        for depth, expected in enumerate(counts, 1):
+            if expected > max_nodes or engine == "pieces" and depth > PIECES_DEPTHS[name]:
+                break
+            position = BitboardPosition.from_fen(fen)
+            start = perf_counter()
+            if workers > 1:
+                nodes = parallel_perft(position, depth, workers, engine, megabytes, executor)
+            elif engine == "pieces":
+                nodes = perft_pieces(position.to_pieces(), position.color, depth)
+            elif megabytes:
+                table = PerftTable(megabytes)
+                nodes = perft(position, depth, table)
+                table.close()
+            else:
+                nodes = perft(position, depth)
+            elapsed = perf_counter() - start
+            total_nodes, total_time = total_nodes + nodes, total_time + elapsed
+            if workers > 1:
+                start = perf_counter()
+                if engine == "pieces":
+                    perft_pieces(position.to_pieces(), position.color, depth)
+                else:
+                    perft(position, depth)
+                serial_time += perf_counter() - start
+            result = "OK" if nodes == expected else f"FAIL (expected {expected})"
+            correct = correct and nodes == expected
+            print(f"{name:<16} depth {depth}: {nodes:>9} nodes {elapsed:8.3f} s {nodes / elapsed:>10.0f} nps  {result}")
+    if executor is not None:
+        executor.shutdown()
+    print()
+    print(f"Total: {total_nodes} nodes in {total_time:.3f} s, {total_nodes / total_time:.0f} nodes per second.")
+    if workers > 1:
+        print(f"Speedup over 1 worker: {serial_time / total_time:.2f} ({serial_time:.3f} s in a single process).")
+    return correct
+
+
+
+##### CLASSES #####
+
+class PerftTable:
+    """Class for a table of perft node counts in shared memory, which the processes of a parallel perft share.
+
+    The table is created with a size in megabytes, and the worker processes
+    attach to it by its name ('name'). Each entry keeps the node count of a
+    position at a depth, found by the Zobrist key of the position, and it is
+    always replaced by the new counts that fall in it.
+    """
+    def __init__(self, megabytes=16, name=None):
+        """Construction of a table of node counts of a given size in megabytes, or attached to the one of a given name."""
+        self.shared = SharedHashTable(PERFT_ENTRY_DATA, megabytes, name)
+        self.name = self.shared.name
+
+    def __repr__(self):
+        """Representation of a table of node counts."""
+        return f"PerftTable('{self.name}', {self.shared.entries} entries)"
+
+    def close(self):
+        """Detach the table from its shared memory, which is also removed if this process created it."""
+        self.shared.close()
+
+    def probe(self, key, depth):
+        """Return the node count stored for a Zobrist key at a given depth, or 'None' if there is none."""
+        entry_key, (nodes, entry_depth) = self.shared.read((key ^ depth) & self.shared.entries - 1)
+        return nodes if entry_key == key and entry_depth == depth else None
+
+    def store(self, key, depth, nodes):
+        """Store the node count of a position at a given depth."""
+        self.shared.write((key ^ depth) & self.shared.entries - 1, key, nodes, depth)
+
+
+
+##### EXECUTABLE #####
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Run the perft suite of the rules of 'Chess Masters'.")
+    parser.add_argument("--max-nodes", type=int, default=100000,
+                        help="the highest published node count to run (100000 by default)")
+    parser.add_argument("--engine", choices=["bitboards", "pieces"], default="bitboards",
+                        help="the rules to measure (bitboards by default)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"the number of processes that share the first moves (1 by default, {cpu_count()} CPUs here)")
+    parser.add_argument("--hash", type=int, default=0,
+                        help="the size in megabytes of the table of node counts (no table by default)")
+    parser.add_argument("--divide", metavar="FEN",
+                        help="print the node count below each move of a position instead")
+    parser.add_argument("--compare", metavar="FEN",
+                        help="check that both rules agree in the move tree of a position instead")
+    parser.add_argument("--depth", type=int, default=3,
+                        help="the depth of '--divide' and '--compare' (3 by default)")
+    arguments = parser.parse_args()
+
+    if arguments.divide:
+        counts = divide(BitboardPosition.from_fen(arguments.divide), arguments.depth)
+        for move_name, nodes in sorted(counts.items()):
+            print(f"{move_name}: {nodes}")
+        print()
+        print(f"Total: {sum(counts.values())}")
+    elif arguments.compare:
+        mismatch = compare(BitboardPosition.from_fen(arguments.compare), arguments.depth)
+        print(f"Mismatch in '{mismatch[0]}': {sorted(mismatch[1])}" if mismatch else "Both rules agree.")
+    else:
+        exit(0 if run_suite(arguments.max_nodes, arguments.engine, arguments.workers, arguments.hash) else 1)
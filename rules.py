@@ -20,6 +20,12 @@ a chess game.
 
 
 
+##### IMPORTS #####
+
+from random import Random
+
+
+
 ##### CONSTANTS #####
 
 """
@@ -32,6 +38,204 @@ COLS = "abcdefgh"
 ROWS = "12345678"
 
 
+"""
+The following constants are used by the bitboard representation of a position.
+
+The constant 'SQUARES' lists the name of the squares in board by their index, 
+from 'a1' (0) to 'h8' (63), and 'SQUARE_INDEX' maps a square's name to its 
+index. Square 'i' is represented by the bit '1 << i' of a bitboard.
+
+The constant 'PIECE_NAMES' gives the order of the piece kinds, so the bitboard 
+of a piece kind 'k' of the side 's' (0 for white, 1 for black) is the number 
+'s * 6 + k' of the twelve bitboards in a position. 'COLORS' gives the color of 
+each side in the same way.
+
+The constants 'FILE_A', 'FILE_H', 'RANK_1'... are the bitboards of some 
+columns and rows of the board, while 'FULL_BOARD' masks a bitboard to 64 bits.
+
+The 'WHITE_KINGSIDE', 'WHITE_QUEENSIDE', 'BLACK_KINGSIDE' and 
+'BLACK_QUEENSIDE' constants are the bits of the castling rights of a position. 
+'CASTLING_RIGHTS_MASK' gives, for each square, the castling rights that are 
+kept when a piece moves from or to that square.
+
+A move is represented by an integer: the origin square in bits 0-5, the 
+destination square in bits 6-11 and the promoted piece kind (or 0) in bits 
+12-14.
+
+"""
+
+SQUARES = [column + row for row in ROWS for column in COLS]
+SQUARE_INDEX = {square: i for i, square in enumerate(SQUARES)}
+
+PIECE_NAMES = "PNBRQK"
+COLORS = "wb"
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+FULL_BOARD = (1 << 64) - 1
+FILE_A = 0x0101010101010101
+FILE_B = FILE_A << 1
+FILE_G = FILE_A << 6
+FILE_H = FILE_A << 7
+RANK_1 = 0xFF
+RANK_2 = RANK_1 << 8
+RANK_3 = RANK_1 << 16
+RANK_6 = RANK_1 << 40
+RANK_7 = RANK_1 << 48
+RANK_8 = RANK_1 << 56
+
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+CASTLING_RIGHTS_MASK = [15] * 64
+CASTLING_RIGHTS_MASK[SQUARE_INDEX["e1"]] = 15 ^ (WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_RIGHTS_MASK[SQUARE_INDEX["h1"]] = 15 ^ WHITE_KINGSIDE
+CASTLING_RIGHTS_MASK[SQUARE_INDEX["a1"]] = 15 ^ WHITE_QUEENSIDE
+CASTLING_RIGHTS_MASK[SQUARE_INDEX["e8"]] = 15 ^ (BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_RIGHTS_MASK[SQUARE_INDEX["h8"]] = 15 ^ BLACK_KINGSIDE
+CASTLING_RIGHTS_MASK[SQUARE_INDEX["a8"]] = 15 ^ BLACK_QUEENSIDE
+
+
+"""
+The constant 'CASTLINGS' describes the four castling movements. Each castling 
+is a tuple with its castling right, the king's origin and destination squares, 
+the rook's origin and destination squares, the bitboard of the squares that 
+must be empty and the squares that cannot be threatened.
+
+The constants 'KNIGHT_STEPS', 'KING_STEPS' and 'PAWN_CAPTURE_STEPS' are the 
+steps, as (column, row) pairs, of the knight's and king's movements and of the 
+pawn's captures of each color. 'ROOK_DIRECTIONS' and 'BISHOP_DIRECTIONS' are 
+the steps of the sliding pieces' movements, and 'DIRECTIONS' joins them so a 
+direction can be referred by its index. 'ROOK_LINES', 'BISHOP_LINES' and 
+'QUEEN_LINES' are the indexes of the directions of each sliding piece, and 
+'POSITIVE_DIRECTIONS' tells if a direction goes to higher square indexes.
+
+"""
+
+CASTLINGS = [(right, 
+              SQUARE_INDEX[king_move[:2]], SQUARE_INDEX[king_move[2:]], 
+              SQUARE_INDEX[rook_move[:2]], SQUARE_INDEX[rook_move[2:]], 
+              sum(1 << SQUARE_INDEX[square] for square in empty), 
+              [SQUARE_INDEX[square] for square in safe])
+             for right, king_move, rook_move, empty, safe in [
+                 (WHITE_KINGSIDE, "e1g1", "h1f1", ["f1", "g1"], ["e1", "f1", "g1"]),
+                 (WHITE_QUEENSIDE, "e1c1", "a1d1", ["b1", "c1", "d1"], ["e1", "d1", "c1"]),
+                 (BLACK_KINGSIDE, "e8g8", "h8f8", ["f8", "g8"], ["e8", "f8", "g8"]),
+                 (BLACK_QUEENSIDE, "e8c8", "a8d8", ["b8", "c8", "d8"], ["e8", "d8", "c8"])]]
+
+KNIGHT_STEPS = ((1, 2), (2, 1), (-1, 2), (-2, 1), (1, -2), (2, -1), (-1, -2), (-2, -1))
+KING_STEPS = ((0, 1), (1, 1), (-1, 1), (1, 0), (-1, 0), (0, -1), (1, -1), (-1, -1))
+PAWN_CAPTURE_STEPS = {"w": ((1, 1), (-1, 1)), "b": ((1, -1), (-1, -1))}
+ROOK_DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+BISHOP_DIRECTIONS = ((1, 1), (-1, 1), (1, -1), (-1, -1))
+DIRECTIONS = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+ROOK_LINES = (0, 1, 2, 3)
+BISHOP_LINES = (4, 5, 6, 7)
+QUEEN_LINES = ROOK_LINES + BISHOP_LINES
+POSITIVE_DIRECTIONS = [d_col + 8 * d_row > 0 for d_col, d_row in DIRECTIONS]
+
+
+"""
+The constant 'ZOBRIST_SEED' is the seed of the random numbers of the Zobrist 
+keys, so every run of the application gives the same key to a position.
+
+"""
+
+ZOBRIST_SEED = 20200101
+
+
+"""
+The following constants are used by the evaluation of a position, whose 
+scores are kept by the positions as their pieces move.
+
+The constants 'PIECE_VALUES' and 'ENDGAME_PIECE_VALUES' give the value of each 
+piece kind in centipawns in the middlegame and in the endgame, in the order of 
+'PIECE_NAMES'. 'PIECE_SQUARE_TABLES' and 'ENDGAME_PIECE_SQUARE_TABLES' give, 
+for each piece kind, the bonus of the piece in each square for the white side, 
+written as the board is seen from the white side (the first row of the table 
+is the row '8'). The tables of a piece are mirrored for the black side.
+
+The constant 'PHASE_VALUES' gives the weight of each piece kind in the game 
+phase, which is 'MAX_PHASE' with all the pieces in the board (the middlegame) 
+and goes down to 0 as they are captured (the endgame).
+
+"""
+
+PIECE_VALUES = (100, 320, 330, 500, 900, 0)
+ENDGAME_PIECE_VALUES = (120, 300, 320, 520, 920, 0)
+
+PIECE_SQUARE_TABLES = (
+    (  0,   0,   0,   0,   0,   0,   0,   0,
+      50,  50,  50,  50,  50,  50,  50,  50,
+      10,  10,  20,  30,  30,  20,  10,  10,
+       5,   5,  10,  25,  25,  10,   5,   5,
+       0,   0,   0,  20,  20,   0,   0,   0,
+       5,  -5, -10,   0,   0, -10,  -5,   5,
+       5,  10,  10, -20, -20,  10,  10,   5,
+       0,   0,   0,   0,   0,   0,   0,   0),
+    (-50, -40, -30, -30, -30, -30, -40, -50,
+     -40, -20,   0,   0,   0,   0, -20, -40,
+     -30,   0,  10,  15,  15,  10,   0, -30,
+     -30,   5,  15,  20,  20,  15,   5, -30,
+     -30,   0,  15,  20,  20,  15,   0, -30,
+     -30,   5,  10,  15,  15,  10,   5, -30,
+     -40, -20,   0,   5,   5,   0, -20, -40,
+     -50, -40, -30, -30, -30, -30, -40, -50),
+    (-20, -10, -10, -10, -10, -10, -10, -20,
+     -10,   0,   0,   0,   0,   0,   0, -10,
+     -10,   0,   5,  10,  10,   5,   0, -10,
+     -10,   5,   5,  10,  10,   5,   5, -10,
+     -10,   0,  10,  10,  10,  10,   0, -10,
+     -10,  10,  10,  10,  10,  10,  10, -10,
+     -10,   5,   0,   0,   0,   0,   5, -10,
+     -20, -10, -10, -10, -10, -10, -10, -20),
+    (  0,   0,   0,   0,   0,   0,   0,   0,
+       5,  10,  10,  10,  10,  10,  10,   5,
+      -5,   0,   0,   0,   0,   0,   0,  -5,
+      -5,   0,   0,   0,   0,   0,   0,  -5,
+      -5,   0,   0,   0,   0,   0,   0,  -5,
+      -5,   0,   0,   0,   0,   0,   0,  -5,
+      -5,   0,   0,   0,   0,   0,   0,  -5,
+       0,   0,   0,   5,   5,   0,   0,   0),
+    (-20, -10, -10,  -5,  -5, -10, -10, -20,
+     -10,   0,   0,   0,   0,   0,   0, -10,
+     -10,   0,   5,   5,   5,   5,   0, -10,
+      -5,   0,   5,   5,   5,   5,   0,  -5,
+       0,   0,   5,   5,   5,   5,   0,  -5,
+     -10,   5,   5,   5,   5,   5,   0, -10,
+     -10,   0,   5,   0,   0,   0,   0, -10,
+     -20, -10, -10,  -5,  -5, -10, -10, -20),
+    (-30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -20, -30, -30, -40, -40, -30, -30, -20,
+     -10, -20, -20, -20, -20, -20, -20, -10,
+      20,  20,   0,   0,   0,   0,  20,  20,
+      20,  30,  10,   0,   0,  10,  30,  20),
+)
+
+ENDGAME_PIECE_SQUARE_TABLES = (
+    (  0,   0,   0,   0,   0,   0,   0,   0,
+      80,  80,  80,  80,  80,  80,  80,  80,
+      50,  50,  50,  50,  50,  50,  50,  50,
+      30,  30,  30,  30,  30,  30,  30,  30,
+      20,  20,  20,  20,  20,  20,  20,  20,
+      10,  10,  10,  10,  10,  10,  10,  10,
+      10,  10,  10,  10,  10,  10,  10,  10,
+       0,   0,   0,   0,   0,   0,   0,   0),
+) + PIECE_SQUARE_TABLES[KNIGHT:KING] + (
+    (-50, -40, -30, -20, -20, -30, -40, -50,
+     -30, -20, -10,   0,   0, -10, -20, -30,
+     -30, -10,  20,  30,  30,  20, -10, -30,
+     -30, -10,  30,  40,  40,  30, -10, -30,
+     -30, -10,  30,  40,  40,  30, -10, -30,
+     -30, -10,  20,  30,  30,  20, -10, -30,
+     -30, -30,   0,   0,   0,   0, -30, -30,
+     -50, -30, -30, -30, -30, -30, -30, -50),
+)
+
+PHASE_VALUES = (0, 1, 1, 2, 4, 0)
+MAX_PHASE = 24
+
+
 
 ##### FUNCTIONS #####
 
@@ -43,6 +247,8 @@ def increase(counter, n=1):
 
 def seek_piece(position, pieces):
     """Return the instance of the piece in a given position."""
+    if isinstance(pieces, Board):
+        return pieces.squares.get(position)
     for piece in pieces:
         if piece.position == position:
             return piece
@@ -122,48 +328,149 @@ def allowed_movements(color, pieces):
     return allowed_movements
 
 
-def check_allowed_movements(color, pieces):
-    """Return a list with the allowed movements in a check position for the side of a given color."""
+def filter_allowed_movements(color, pieces):
+    """Return a list with the allowed movements for the side of a given color, trying each one in the board."""
     movements = []
-    for (p_name, pos_1, pos_2) in allowed_movements(color, pieces):
-        piece_1 = seek_piece(pos_1, pieces)
-        piece_2 = seek_piece(pos_2, pieces)
-        piece_1.set_position(pos_2)
-        if piece_2:
-            name = "X"
-            name, piece_2.name = piece_2.name, name
+    for movement in allowed_movements(color, pieces):
+        undo = make_move(movement, pieces)
         if not is_check(color, pieces):
-            movements.append((p_name, pos_1, pos_2))
-        piece_1.set_position(pos_1)
-        if piece_2:
-            piece_2.name = name
+            movements.append(movement)
+        unmake_move(undo, pieces)
     return movements
 
 
-def is_threatened(position, color, pieces):
-    """Return 'True' if the given position is threatened by any piece of the other color. Otherwise return 'False'."""
+def check_allowed_movements(color, pieces):
+    """Return a list with the allowed movements in a check position for the side of a given color.
+    
+    The pieces giving check and the pinned pieces are found once from the 
+    king's position. Under double check only the king can move; under check 
+    the other pieces can only capture the checking piece or block its way; and 
+    a pinned piece can only move along the line of its pin. Only the king's 
+    movements are tried in the board.
+    """
+    king, checkers, pins = get_checkers_and_pins(color, pieces)
+    if not king:
+        return allowed_movements(color, pieces)
+    defences = set(checkers[0]) if len(checkers) == 1 else None
+    
+    movements = []
     for piece in pieces:
         if piece.color != color:
-            if piece.name == "R":
-                if position in rook_movements(piece.position, pieces):
-                    return True
-            elif piece.name == "N":
-                if position in knight_movements(piece.position, pieces):
-                    return True
-            elif piece.name == "B":
-                if position in bishop_movements(piece.position, pieces):
-                    return True
-            elif piece.name == "Q":
-                if position in queen_movements(piece.position, pieces):
-                    return True
-            elif piece.name == "K":
-                if position in king_movements(piece.position, pieces):
-                    return True
-            elif piece.name == "P":
-                if position in piece.pawn_capture_movements():
-                    return True
+            continue
+        if piece is king:
+            for move in piece.allow_movements(pieces):
+                movement = (piece.name, piece.position, move)
+                undo = make_move(movement, pieces)
+                if not is_check(color, pieces):
+                    movements.append(movement)
+                unmake_move(undo, pieces)
+        elif len(checkers) < 2:
+            pin = pins.get(piece)
+            for move in piece.allow_movements(pieces):
+                if (defences is None or move in defences) and (pin is None or move in pin):
+                    movements.append((piece.name, piece.position, move))
+    return movements
+
+
+def get_checkers_and_pins(color, pieces):
+    """Return the King of a given color, the pieces giving check to it and its pinned pieces.
+    
+    Each piece giving check is represented by a list with its position and the 
+    squares between it and the King. The pinned pieces are a dictionary which 
+    maps each piece to the list of squares between the King and the pinning 
+    piece, including it.
+    """
+    king = None
+    for piece in pieces:
+        if piece.color == color and piece.name == "K":
+            king = piece
+            break
     else:
-        return False
+        return None, [], {}
+    
+    checkers, pins = [], {}
+    for position in KNIGHT_MOVES[king.position]:
+        piece = seek_piece(position, pieces)
+        if piece and piece.color != color and piece.name == "N":
+            checkers.append([position])
+    for position in PAWN_CAPTURES[color][king.position]:
+        piece = seek_piece(position, pieces)
+        if piece and piece.color != color and piece.name == "P":
+            checkers.append([position])
+            
+    for direction, ray in enumerate(RAYS[king.position]):
+        sliders = "RQ" if direction in ROOK_LINES else "BQ"
+        own_piece = None
+        for i, position in enumerate(ray):
+            piece = seek_piece(position, pieces)
+            if not piece:
+                continue
+            if piece.color == color:
+                if own_piece:
+                    break
+                own_piece = piece
+            else:
+                if piece.name in sliders:
+                    if own_piece:
+                        pins[own_piece] = ray[:i + 1]
+                    else:
+                        checkers.append(ray[:i + 1])
+                break
+            
+    return king, checkers, pins
+
+
+def get_threats(position, color, pieces):
+    """Yield the pieces of the other color which threaten a given position.
+    
+    The threats are looked for from the position itself: the knights, pawns 
+    and king in the squares from which they would reach it, and the sliding 
+    pieces found first in each of its rays.
+    """
+    for square in KNIGHT_MOVES[position]:
+        piece = seek_piece(square, pieces)
+        if piece and piece.color != color and piece.name == "N":
+            yield piece
+    for square in PAWN_CAPTURES[color][position]:
+        piece = seek_piece(square, pieces)
+        if piece and piece.color != color and piece.name == "P":
+            yield piece
+    for square in KING_MOVES[position]:
+        piece = seek_piece(square, pieces)
+        if piece and piece.color != color and piece.name == "K":
+            yield piece
+    for direction, ray in enumerate(RAYS[position]):
+        sliders = "RQ" if direction in ROOK_LINES else "BQ"
+        for square in ray:
+            piece = seek_piece(square, pieces)
+            if piece:
+                if piece.color != color and piece.name in sliders:
+                    yield piece
+                break
+
+
+def is_threatened(position, color, pieces):
+    """Return 'True' if the given position is threatened by any piece of the other color. Otherwise return 'False'."""
+    for piece in get_threats(position, color, pieces):
+        return True
+    return False
+
+
+def threatening_pieces(position, color, pieces):
+    """Return a list with the pieces of the other color which threaten a given position."""
+    return list(get_threats(position, color, pieces))
+
+
+def castling_movements(color, pieces):
+    """Return a list with the castling movements allowed for the side of a given color."""
+    movements = []
+    for piece in pieces:
+        if piece.color == color and piece.name == "K":
+            if piece.castling_move("kingside", pieces):
+                movements.append(("K", piece.position, "g" + piece.row))
+            if piece.castling_move("queenside", pieces):
+                movements.append(("K", piece.position, "c" + piece.row))
+    return movements
 
 
 def is_check(color, pieces):
@@ -203,157 +510,129 @@ def create(piece_name, color, position, pieces):
         pieces.append(Pawn(color, position))
 
 
-def rook_movements(position, pieces):
-    """Define the rook's movements in the board."""
-    column, row = position[0], position[1]
+def make_move(movement, pieces, promotion="Q"):
+    """Make a movement in the board and return the record needed to unmake it.
     
-    r_cols_moves = []
-    if get_right_columns(column):
-        for r_col in get_right_columns(column):
-            r_cols_moves.append(r_col + row)
-            if seek_piece(r_col + row, pieces):
-                break
+    The movement is a tuple with the piece's name, its position and its new 
+    position, as the ones in 'allowed_movements'. A king moving two columns 
+    castles, and a pawn reaching the last row is promoted to the 'promotion' 
+    piece. The record keeps the captured, promoted and castling pieces with 
+    their indexes in the list of pieces and the castling rights they had.
+    """
+    name, position, new_position = movement
+    piece = seek_piece(position, pieces)
     
-    l_cols_moves = []
-    if get_left_columns(column):
-        for l_col in get_left_columns(column):
-            l_cols_moves.append(l_col + row)
-            if seek_piece(l_col + row, pieces):
-                break
+    captured = seek_piece(new_position, pieces)
+    captured_index = None
+    if captured:
+        captured_index = pieces.index(captured)
+        pieces.remove(captured)
         
-    up_rows_moves = []
-    if get_upper_rows(row):
-        for up_row in get_upper_rows(row):
-            up_rows_moves.append(column + up_row)
-            if seek_piece(column + up_row, pieces):
-                break
+    castling = piece.castling if name in "KR" else None
+    rook = rook_position = rook_castling = None
+    if name == "K":
+        piece.castling = False
+        if abs(COLS.index(position[0]) - COLS.index(new_position[0])) == 2:
+            rook_position = ("h" if new_position[0] == "g" else "a") + position[1]
+            rook = seek_piece(rook_position, pieces)
+            rook_castling, rook.castling = rook.castling, False
+            rook.set_position(("f" if new_position[0] == "g" else "d") + position[1])
+    elif name == "R":
+        piece.castling = False
+    piece.set_position(new_position)
     
-    lo_rows_moves = []
-    if get_lower_rows(row):
-        for lo_row in get_lower_rows(row):
-            lo_rows_moves.append(column + lo_row)
-            if seek_piece(column + lo_row, pieces):
-                break
-            
-    movements = r_cols_moves + l_cols_moves + up_rows_moves + lo_rows_moves
+    promoted = piece_index = None
+    if name == "P" and new_position[1] in "18":
+        piece_index = pieces.index(piece)
+        pieces.remove(piece)
+        create(promotion, piece.color, new_position, pieces)
+        promoted = pieces[-1]
+        
+    return (piece, position, castling, captured, captured_index, 
+            promoted, piece_index, rook, rook_position, rook_castling)
+
+
+def unmake_move(undo, pieces):
+    """Unmake a movement in the board from the record returned by 'make_move'."""
+    (piece, position, castling, captured, captured_index, 
+     promoted, piece_index, rook, rook_position, rook_castling) = undo
+    if promoted:
+        pieces.remove(promoted)
+        pieces.insert(piece_index, piece)
+    piece.set_position(position)
+    if castling is not None:
+        piece.castling = castling
+    if rook:
+        rook.set_position(rook_position)
+        rook.castling = rook_castling
+    if captured:
+        pieces.insert(captured_index, captured)
+
+
+def create_move_list(chess_notation):
+    """Create a list which includes game's chess moves as elements."""
+    move_list = []
+    turn = "b" if chess_notation[0][1] == "..." else "w"
+    if len(chess_notation[0]) > len(chess_notation[1]):
+        chess_notation[1].append("...")
+    for w_move, b_move in zip(chess_notation[0], chess_notation[1]):
+        if w_move.upper() != "WHITE" and b_move.upper() != "BLACK":
+            move_list.append(w_move)
+            move_list.append(b_move)
+    while "..." in move_list:
+        move_list.remove("...")
+    return (move_list, turn)
+
+
+def get_game_movement(move, color):
+    """Return the movement of a move in a game's notation and the piece a pawn is promoted to."""
+    row = "1" if color == "w" else "8"
+    if move[:5] == "0-0-0":
+        return ("K", "e" + row, "c" + row), "Q"
+    elif move[:3] == "0-0":
+        return ("K", "e" + row, "g" + row), "Q"
     
+    m_piece = move[0].upper()
+    m_init = move[1:3].lower()
+    m_ends = move[4:6].lower()
+    promotion = move[7] if m_piece == "P" and m_ends[-1] in "1/8" else "Q"
+    return (m_piece, m_init, m_ends), promotion
+
+
+def sliding_movements(rays, pieces):
+    """Define the movements of a sliding piece along its rays, up to the first piece in each ray."""
+    movements = []
+    for ray in rays:
+        for square in ray:
+            movements.append(square)
+            if seek_piece(square, pieces):
+                break
     return movements
 
 
+def rook_movements(position, pieces):
+    """Define the rook's movements in the board."""
+    return sliding_movements(ROOK_RAYS[position], pieces)
+
+
 def knight_movements(position, pieces):
     """Define the knight's movements in the board."""
-    column, row = position[0], position[1]
-    
-    upper_row_1 = get_upadjacent_row(row)
-    upper_row_2 = get_upadjacent_row(upper_row_1) if upper_row_1 else None
-    lower_row_1 = get_loadjacent_row(row)
-    lower_row_2 = get_loadjacent_row(lower_row_1) if lower_row_1 else None
-    right_col_1 = get_radjacent_col(column)
-    right_col_2 = get_radjacent_col(right_col_1) if right_col_1 else None
-    left_col_1 = get_ladjacent_col(column)
-    left_col_2 = get_ladjacent_col(left_col_1) if left_col_1 else None
-    
-    upper_moves = []
-    if upper_row_2 and right_col_1:
-        upper_moves.append(right_col_1 + upper_row_2)
-    if upper_row_1 and right_col_2:
-        upper_moves.append(right_col_2 + upper_row_1)
-    if upper_row_2 and left_col_1:
-        upper_moves.append(left_col_1 + upper_row_2)
-    if upper_row_1 and left_col_2:
-        upper_moves.append(left_col_2 + upper_row_1)
-        
-    lower_moves =[]
-    if lower_row_2 and right_col_1: 
-        lower_moves.append(right_col_1 + lower_row_2)
-    if lower_row_1 and right_col_2: 
-        lower_moves.append(right_col_2 + lower_row_1) 
-    if lower_row_2 and left_col_1: 
-        lower_moves.append(left_col_1 + lower_row_2)
-    if lower_row_1 and left_col_2:
-        lower_moves.append(left_col_2 + lower_row_1)
-    
-    movements = upper_moves + lower_moves
-
-    return movements
+    return list(KNIGHT_MOVES[position])
 
 
 def bishop_movements(position, pieces):
     """Define the bishop's movements in the board."""
-    column, row = position[0], position[1]
-    
-    r_upper_moves = []
-    if get_right_columns(column) and get_upper_rows(row):
-        for i_col, i_row in zip(get_right_columns(column), get_upper_rows(row)):
-            r_upper_moves.append(i_col + i_row)
-            if seek_piece(i_col + i_row, pieces):
-                break
-    
-    l_upper_moves = []
-    if get_left_columns(column) and get_upper_rows(row):
-        for i_col, i_row in zip(get_left_columns(column), get_upper_rows(row)):
-            l_upper_moves.append(i_col + i_row)
-            if seek_piece(i_col + i_row, pieces):
-                break
-    
-    r_lower_moves = []
-    if get_right_columns(column) and get_lower_rows(row):    
-        for i_col, i_row in zip(get_right_columns(column), get_lower_rows(row)):
-            r_lower_moves.append(i_col + i_row)
-            if seek_piece(i_col + i_row, pieces):
-                break
-    
-    l_lower_moves = []
-    if get_left_columns(column) and get_lower_rows(row):
-        for i_col, i_row in zip(get_left_columns(column), get_lower_rows(row)):
-            l_lower_moves.append(i_col + i_row)
-            if seek_piece(i_col + i_row, pieces):
-                break
-        
-    movements = r_upper_moves + l_upper_moves + r_lower_moves + l_lower_moves
-    
-    return movements
+    return sliding_movements(BISHOP_RAYS[position], pieces)
 
 
 def queen_movements(position, pieces):
     """Define the queen's movements in the board."""
-    return rook_movements(position, pieces) + bishop_movements(position, pieces)
+    return sliding_movements(QUEEN_RAYS[position], pieces)
 
 
 def king_movements(position, pieces):
     """Define the king's movements in the board."""
-    column, row = position[0], position[1]
-    
-    upper_row = get_upadjacent_row(row)
-    lower_row = get_loadjacent_row(row)
-    right_col = get_radjacent_col(column)
-    left_col = get_ladjacent_col(column)
-    
-    upper_moves = []
-    if upper_row:
-        upper_moves.append(column + upper_row)
-    if upper_row and right_col:
-        upper_moves.append(right_col + upper_row)
-    if upper_row and left_col:
-        upper_moves.append(left_col + upper_row)
-        
-    row_moves = []
-    if right_col:
-        row_moves.append(right_col + row)
-    if left_col:
-        row_moves.append(left_col + row)
-        
-    lower_moves =[]
-    if lower_row:
-        lower_moves.append(column + lower_row)
-    if lower_row and right_col:
-        lower_moves.append(right_col + lower_row)
-    if lower_row and left_col:
-        lower_moves.append(left_col + lower_row)
-    
-    movements = upper_moves + row_moves + lower_moves
-    
-    return movements
+    return list(KING_MOVES[position])
 
 
 def pawn_movements(color, position):
@@ -375,22 +654,318 @@ def pawn_movements(color, position):
     return movements
 
 
+### Bitboards ###
+
+def iterate_squares(bitboard):
+    """Return a list with the index of the squares set in a bitboard."""
+    squares = []
+    while bitboard:
+        bit = bitboard & -bitboard
+        squares.append(bit.bit_length() - 1)
+        bitboard ^= bit
+    return squares
+
+
+def sliding_attacks(square, occupied, directions):
+    """Return the bitboard of the squares attacked by a sliding piece in a given square.
+    
+    The piece slides along the rays of the given directions (indexes of 
+    'DIRECTIONS'). The first occupied square of a ray is attacked too, and the 
+    squares behind it are taken off the ray with the ray of the blocker.
+    """
+    attacks = 0
+    for direction in directions:
+        ray_attacks = RAY_ATTACKS[direction]
+        ray = ray_attacks[square]
+        blockers = ray & occupied
+        if blockers:
+            if POSITIVE_DIRECTIONS[direction]:
+                ray ^= ray_attacks[(blockers & -blockers).bit_length() - 1]
+            else:
+                ray ^= ray_attacks[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+
+def piece_attacks(kind, square, occupied):
+    """Return the bitboard of the squares attacked by a piece kind (but a pawn) in a given square."""
+    if kind == KNIGHT:
+        return KNIGHT_ATTACKS[square]
+    elif kind == BISHOP:
+        return sliding_attacks(square, occupied, BISHOP_LINES)
+    elif kind == ROOK:
+        return sliding_attacks(square, occupied, ROOK_LINES)
+    elif kind == QUEEN:
+        return sliding_attacks(square, occupied, QUEEN_LINES)
+    elif kind == KING:
+        return KING_ATTACKS[square]
+
+
+def get_move_name(move):
+    """Return the name of a move, as its origin and destination squares and the promoted piece (as 'e7e8q')."""
+    name = SQUARES[move & 63] + SQUARES[move >> 6 & 63]
+    return name + PIECE_NAMES[move >> 12].lower() if move >> 12 else name
+
+
+def get_castling_rights(pieces):
+    """Return the castling rights of a list of pieces, from the 'castling' attributes of its kings and rooks."""
+    rights = 0
+    for right, king_from, _, rook_from, _, _, _ in CASTLINGS:
+        king = seek_piece(SQUARES[king_from], pieces)
+        rook = seek_piece(SQUARES[rook_from], pieces)
+        if king and rook and king.name == "K" and rook.name == "R" and \
+           king.color == rook.color == COLORS[king_from // 56] and \
+           king.castling and rook.castling:
+            rights |= right
+    return rights
+
+
+def add_pawn_moves(moves, from_square, to_square):
+    """Add the moves of a pawn to a list of moves, one for each promotion when it reaches the last row."""
+    if to_square >= 56 or to_square < 8:
+        for kind in (QUEEN, ROOK, BISHOP, KNIGHT):
+            moves.append(from_square | to_square << 6 | kind << 12)
+    else:
+        moves.append(from_square | to_square << 6)
+
+
+
+##### TABLES #####
+
+"""
+The following tables are built once, when the module is imported, so the 
+movements of the pieces do not need to be computed in every call.
+
+The tables 'KNIGHT_MOVES' and 'KING_MOVES' map each square's name to a list 
+with the squares' names of the knight's and king's movements from it. 
+'PAWN_CAPTURES' maps each color to a table with the pawn's capture movements.
+
+The table 'RAYS' maps each square's name to the rays of squares in each of 
+the eight 'DIRECTIONS', from the nearest square to the edge of the board. 
+'ROOK_RAYS', 'BISHOP_RAYS' and 'QUEEN_RAYS' keep the rays of each sliding 
+piece.
+
+The tables 'KNIGHT_ATTACKS', 'KING_ATTACKS' and 'PAWN_ATTACKS' are the same 
+for the bitboard representation: they map each square's index (and each side 
+for the pawns) to the bitboard of the squares attacked from it. 
+'RAY_ATTACKS' maps each direction and square's index to the bitboard of the 
+ray, and 'BETWEEN' maps each pair of squares' indexes to the bitboard of the 
+squares between them when they are in the same line (or 0 otherwise).
+
+The Zobrist key of a position is the XOR of a random number for each piece in 
+its square ('ZOBRIST_PIECES', by bitboard number and square's index), for the 
+black side to move ('ZOBRIST_SIDE'), for its castling rights 
+('ZOBRIST_CASTLING', by the bits of the rights) and for the column of the en 
+passant square when a pawn can capture there ('ZOBRIST_EN_PASSANT'). Moving a 
+piece only changes the numbers of the squares it leaves and reaches, so the 
+key is updated with a few XOR operations instead of being computed again. 
+'PAWN_KEYS' keeps the numbers of the pawns (and 0 for the other pieces), for 
+the key of the pawns alone.
+
+The tables 'MIDGAME_VALUES' and 'ENDGAME_VALUES' join the piece values and the 
+piece-square tables in the value of each piece (by bitboard number) in each 
+square's index, with the values of the black pieces negative. The scores of a 
+position for the white side are the sums of the values of its pieces, and 
+they are updated by adding and taking away the values of the pieces that move.
+
+"""
+
+def get_step_squares(square, steps):
+    """Return a list with the squares reached from a square by a given list of steps."""
+    column, row = COLS.index(square[0]), ROWS.index(square[1])
+    return [COLS[column + d_col] + ROWS[row + d_row] for d_col, d_row in steps
+            if 0 <= column + d_col < 8 and 0 <= row + d_row < 8]
+
+
+def get_ray_squares(square, direction):
+    """Return a list with the squares from a square to the edge of the board in a given direction."""
+    d_col, d_row = direction
+    column, row = COLS.index(square[0]) + d_col, ROWS.index(square[1]) + d_row
+    ray = []
+    while 0 <= column < 8 and 0 <= row < 8:
+        ray.append(COLS[column] + ROWS[row])
+        column, row = column + d_col, row + d_row
+    return ray
+
+
+def get_squares_bitboard(squares):
+    """Return the bitboard of a given list of squares' names."""
+    return sum(1 << SQUARE_INDEX[square] for square in squares)
+
+
+def get_between_table():
+    """Return a table with the bitboard of the squares between each pair of squares in the same line."""
+    table = [[0] * 64 for _ in SQUARES]
+    for square in SQUARES:
+        for ray in RAYS[square]:
+            for i, target in enumerate(ray):
+                table[SQUARE_INDEX[square]][SQUARE_INDEX[target]] = get_squares_bitboard(ray[:i])
+    return table
+
+
+def get_zobrist_tables(seed):
+    """Return the random numbers of the pieces in each square, the side to move, the castling rights and the en passant columns."""
+    generator = Random(seed)
+    pieces = [[generator.getrandbits(64) for _ in SQUARES] for _ in range(12)]
+    side = generator.getrandbits(64)
+    rights = [generator.getrandbits(64) for _ in range(4)]
+    castling = [0] * 16
+    for mask in range(16):
+        for i, right_key in enumerate(rights):
+            if mask & 1 << i:
+                castling[mask] ^= right_key
+    en_passant = [generator.getrandbits(64) for _ in COLS]
+    return pieces, side, castling, en_passant
+
+
+def get_piece_square_values(piece_values, piece_square_tables):
+    """Return a table with the value of each piece (by bitboard number) in each square, for the white side."""
+    values = []
+    for side in (0, 1):
+        for kind, table in enumerate(piece_square_tables):
+            values.append([])
+            for square in range(64):
+                row = square >> 3 if side else 7 - (square >> 3)
+                value = piece_values[kind] + table[row * 8 + (square & 7)]
+                values[-1].append(-value if side else value)
+    return values
+
+
+KNIGHT_MOVES = {square: get_step_squares(square, KNIGHT_STEPS) for square in SQUARES}
+KING_MOVES = {square: get_step_squares(square, KING_STEPS) for square in SQUARES}
+PAWN_CAPTURES = {color: {square: get_step_squares(square, PAWN_CAPTURE_STEPS[color]) for square in SQUARES} 
+                 for color in COLORS}
+
+RAYS = {square: [get_ray_squares(square, direction) for direction in DIRECTIONS] for square in SQUARES}
+ROOK_RAYS = {square: [RAYS[square][direction] for direction in ROOK_LINES] for square in SQUARES}
+BISHOP_RAYS = {square: [RAYS[square][direction] for direction in BISHOP_LINES] for square in SQUARES}
+QUEEN_RAYS = {square: [RAYS[square][direction] for direction in QUEEN_LINES] for square in SQUARES}
+
+KNIGHT_ATTACKS = [get_squares_bitboard(KNIGHT_MOVES[square]) for square in SQUARES]
+KING_ATTACKS = [get_squares_bitboard(KING_MOVES[square]) for square in SQUARES]
+PAWN_ATTACKS = [[get_squares_bitboard(PAWN_CAPTURES[color][square]) for square in SQUARES] for color in COLORS]
+RAY_ATTACKS = [[get_squares_bitboard(RAYS[square][direction]) for square in SQUARES] for direction in QUEEN_LINES]
+BETWEEN = get_between_table()
+
+ZOBRIST_PIECES, ZOBRIST_SIDE, ZOBRIST_CASTLING, ZOBRIST_EN_PASSANT = get_zobrist_tables(ZOBRIST_SEED)
+PAWN_KEYS = [keys if piece % 6 == PAWN else [0] * 64 for piece, keys in enumerate(ZOBRIST_PIECES)]
+
+MIDGAME_VALUES = get_piece_square_values(PIECE_VALUES, PIECE_SQUARE_TABLES)
+ENDGAME_VALUES = get_piece_square_values(ENDGAME_PIECE_VALUES, ENDGAME_PIECE_SQUARE_TABLES)
+
+
+
 ##### CLASSES #####
 
+class Board(list):
+    """List of pieces which keeps a map from the board's squares to the pieces on them.
+    
+    The map is updated when a piece is added to or removed from the board (a 
+    capture or a promotion) and when a piece is set to a new position, so 
+    'seek_piece' does not need to look through the whole list of pieces.
+    """
+    def __init__(self, pieces=()):
+        """Construction of a board instance from an iterable of pieces."""
+        super().__init__()
+        self.squares = {}
+        for piece in pieces:
+            self.append(piece)
+            
+    def __reduce__(self):
+        """Reduce the board to its pieces for copying and pickling."""
+        return (Board, (list(self),))
+        
+    def append(self, piece):
+        """Add a piece to the board."""
+        super().append(piece)
+        self.squares[piece.position] = piece
+        piece.board = self
+        
+    def insert(self, index, piece):
+        """Add a piece to the board before a given index."""
+        super().insert(index, piece)
+        self.squares[piece.position] = piece
+        piece.board = self
+        
+    def remove(self, piece):
+        """Remove a piece from the board."""
+        super().remove(piece)
+        if self.squares.get(piece.position) is piece:
+            del self.squares[piece.position]
+        piece.board = None
+        
+    def relocate(self, piece, new_position):
+        """Update the map of squares when a piece is set to a new position."""
+        if self.squares.get(piece.position) is piece:
+            del self.squares[piece.position]
+        self.squares[new_position] = piece
+
+
 class Piece:
-    """The main class for chess pieces."""
-    pass
+    """The main class for chess pieces.
+    
+    The pieces have no '__dict__': their attributes are slots, and the index 
+    of their square in 'SQUARES' is the only record of their position. The 
+    'position', 'column' and 'row' strings are derived from it on access.
+    """
+    __slots__ = ("color", "square", "board")
+    
+    def __init__(self, color, position):
+        """Construction of a piece instance."""
+        self.color = color
+        self.square = SQUARE_INDEX[position]
+        self.board = None
+        
+    @property
+    def position(self):
+        """Return the square of the piece, as 'e4'."""
+        return SQUARES[self.square]
+    
+    @property
+    def column(self):
+        """Return the column of the piece, as 'e'."""
+        return COLS[self.square & 7]
+    
+    @property
+    def row(self):
+        """Return the row of the piece, as '4'."""
+        return ROWS[self.square >> 3]
+    
+    def set_position(self, new_position):
+        """Set the piece to a new position in the board."""
+        if self.board is not None:
+            self.board.relocate(self, new_position)
+        self.square = SQUARE_INDEX[new_position]
+    
+    def __getstate__(self):
+        """Return the state of the piece without its board, for copying and pickling."""
+        return self.color, self.square, getattr(self, "castling", None)
+    
+    def __deepcopy__(self, memo):
+        """Return a copy of the piece without its board."""
+        piece = object.__new__(type(self))
+        piece.__setstate__(self.__getstate__())
+        return piece
+    
+    def __setstate__(self, state):
+        """Restore the state of a piece, also from the dictionary of the pickles saved before '__slots__'."""
+        if isinstance(state, dict):
+            state = state["color"], SQUARE_INDEX[state["position"]], state.get("castling")
+        self.color, self.square, castling = state
+        self.board = None
+        if castling is not None:
+            self.castling = castling
 
 
 class Rook(Piece):
     """Class for rook in chess."""
+    __slots__ = ("castling",)
+    name = "R"
+    kind = ROOK
+    
     def __init__(self, color, position):
         """Construction of a rook instance."""
-        self.name = "R"
-        self.color = color
-        self.position = position
-        self.column = position[0]
-        self.row = position[1]
+        super().__init__(color, position)
         self.castling = True
         
     def __repr__(self):
@@ -403,12 +978,6 @@ class Rook(Piece):
         col_correct = True if self.column in "abcdefgh" else False
         return all([row_correct, col_correct])
     
-    def set_position(self, new_position):
-        """Set the piece to a new position in the board."""
-        self.position = new_position
-        self.column = new_position[0]
-        self.row = new_position[1]
-        
     def allow_movements(self, pieces):
         """Return a list with the allowed movements for the piece in the board."""
         movements = rook_movements(self.position, pieces)
@@ -426,9 +995,7 @@ class Rook(Piece):
             if piece:
                 print("A piece has been captured!", end="\n\n")
                 pieces.remove(piece)
-            self.position = position
-            self.column = position[0]
-            self.row = position[1]
+            self.set_position(position)
             self.castling = False
         else:
             print("Invalid movement.", end="\n\n")
@@ -436,14 +1003,10 @@ class Rook(Piece):
 
 class Knight(Piece):
     """Class for knight in chess."""
-    def __init__(self, color, position):
-        """Construction of a knight instance."""
-        self.name = "N"
-        self.color = color
-        self.position = position
-        self.column = position[0]
-        self.row = position[1]
-        
+    __slots__ = ()
+    name = "N"
+    kind = KNIGHT
+    
     def __repr__(self):
         """Representation of a knight instance."""
         return f"Knight('{self.color}', '{self.position}')"
@@ -454,12 +1017,6 @@ class Knight(Piece):
         col_correct = True if self.column in "abcdefgh" else False
         return all([row_correct, col_correct])
     
-    def set_position(self, new_position):
-        """Set the piece to a new position in the board."""
-        self.position = new_position
-        self.column = new_position[0]
-        self.row = new_position[1]
-        
     def allow_movements(self, pieces): 
         """Return a list with the allowed movements for the piece in the board."""
         movements = knight_movements(self.position, pieces)
@@ -477,23 +1034,17 @@ class Knight(Piece):
             if piece:
                 print("A piece has been captured!", end="\n\n")
                 pieces.remove(piece)
-            self.position = position
-            self.column = position[0]
-            self.row = position[1]
+            self.set_position(position)
         else:
             print("Invalid movement.", end="\n\n")
 
 
 class Bishop(Piece):
     """Class for bishop in chess."""
-    def __init__(self, color, position):
-        """Construction of a bishop instance."""
-        self.name = "B"
-        self.color = color
-        self.position = position
-        self.column = position[0]
-        self.row = position[1]
-        
+    __slots__ = ()
+    name = "B"
+    kind = BISHOP
+    
     def __repr__(self):
         """Representation of a bishop instance."""
         return f"Bishop('{self.color}', '{self.position}')"
@@ -504,12 +1055,6 @@ class Bishop(Piece):
         col_correct = True if self.column in "abcdefgh" else False
         return all([row_correct, col_correct])
     
-    def set_position(self, new_position):
-        """Set the piece to a new position in the board."""
-        self.position = new_position
-        self.column = new_position[0]
-        self.row = new_position[1]
-        
     def allow_movements(self, pieces):   
         """Return a list with the allowed movements for the piece in the board."""
         movements = bishop_movements(self.position, pieces)
@@ -527,23 +1072,17 @@ class Bishop(Piece):
             if piece:
                 print("A piece has been captured!", end="\n\n")
                 pieces.remove(piece)
-            self.position = position
-            self.column = position[0]
-            self.row = position[1]
+            self.set_position(position)
         else:
             print("Invalid movement.", end="\n\n")
 
 
 class Queen(Piece):
     """Class for queen in chess."""
-    def __init__(self, color, position):
-        """Construction of a queen instance."""
-        self.name = "Q"
-        self.color = color
-        self.position = position
-        self.column = position[0]
-        self.row = position[1]
-        
+    __slots__ = ()
+    name = "Q"
+    kind = QUEEN
+    
     def __repr__(self):
         """Representation of a queen instance."""
         return f"Queen('{self.color}', '{self.position}')"
@@ -554,12 +1093,6 @@ class Queen(Piece):
         col_correct = True if self.column in "abcdefgh" else False
         return all([row_correct, col_correct])
     
-    def set_position(self, new_position):
-        """Set the piece to a new position in the board."""
-        self.position = new_position
-        self.column = new_position[0]
-        self.row = new_position[1]
-        
     def allow_movements(self, pieces):      
         """Return a list with the allowed movements for the piece in the board."""
         movements = queen_movements(self.position, pieces)
@@ -577,22 +1110,20 @@ class Queen(Piece):
             if piece:
                 print("A piece has been captured!", end="\n\n")
                 pieces.remove(piece)
-            self.position = position
-            self.column = position[0]
-            self.row = position[1]
+            self.set_position(position)
         else:
             print("Invalid movement.", end="\n\n")
 
 
 class King(Piece):
     """Class for king in chess."""
+    __slots__ = ("castling",)
+    name = "K"
+    kind = KING
+    
     def __init__(self, color, position):
         """Construction of a king instance."""
-        self.name = "K"
-        self.color = color
-        self.position = position
-        self.column = position[0]
-        self.row = position[1]
+        super().__init__(color, position)
         self.castling = True
         
     def __repr__(self):
@@ -605,12 +1136,6 @@ class King(Piece):
         col_correct = True if self.column in "abcdefgh" else False
         return all([row_correct, col_correct])
     
-    def set_position(self, new_position):
-        """Set the piece to a new position in the board."""
-        self.position = new_position
-        self.column = new_position[0]
-        self.row = new_position[1]
-        
     def allow_movements(self, pieces):       
         """Return a list with the allowed movements for the piece in the board."""
         movements = king_movements(self.position, pieces)
@@ -631,34 +1156,24 @@ class King(Piece):
             if piece:
                 print("A piece has been captured!", end="\n\n")
                 pieces.remove(piece)
-            self.position = position
-            self.column = position[0]
-            self.row = position[1]
+            self.set_position(position)
             self.castling = False
             
         elif position == "0-0":
             if self.castling_move("kingside", pieces):
                 self.castling = False
-                self.column = "g"
-                self.row = "1" if self.color == "w" else "8"
-                self.position = "g1" if self.color == "w" else "g8"
+                self.set_position("g1" if self.color == "w" else "g8")
                 rook_pos = "h1" if self.color == "w" else "h8"
-                seek_piece(rook_pos, pieces).column = "f"
-                seek_piece(rook_pos, pieces).row = "1" if self.color == "w" else "8"
-                seek_piece(rook_pos, pieces).position = "f1" if self.color == "w" else "f8"
+                seek_piece(rook_pos, pieces).set_position("f1" if self.color == "w" else "f8")
             else:
                 print("Invalid castling movement.", end="\n\n")
                 
         elif position == "0-0-0":
             if self.castling_move("queenside", pieces):
                 self.castling = False
-                self.column = "c"
-                self.row = "1" if self.color == "w" else "8"
-                self.position = "c1" if self.color == "w" else "c8"
+                self.set_position("c1" if self.color == "w" else "c8")
                 rook_pos = "a1" if self.color == "w" else "a8" 
-                seek_piece(rook_pos, pieces).column = "d"
-                seek_piece(rook_pos, pieces).row = "1" if self.color == "w" else "8"
-                seek_piece(rook_pos, pieces).position = "d1" if self.color == "w" else "d8"
+                seek_piece(rook_pos, pieces).set_position("d1" if self.color == "w" else "d8")
             else:
                 print("Invalid castling movement.", end="\n\n")
         
@@ -736,14 +1251,10 @@ class King(Piece):
 
 class Pawn(Piece):
     """Class for pawn in chess."""
-    def __init__(self, color, position):
-        """Construction of a pawn instance."""
-        self.name = "P"
-        self.color = color
-        self.position = position
-        self.column = position[0]
-        self.row = position[1]
-        
+    __slots__ = ()
+    name = "P"
+    kind = PAWN
+    
     def __repr__(self):
         """Representation of a pawn instance."""
         return f"Pawn('{self.color}', '{self.position}')"
@@ -754,35 +1265,9 @@ class Pawn(Piece):
         col_correct = True if self.column in "abcdefgh" else False
         return all([row_correct, col_correct])
     
-    def set_position(self, new_position):
-        """Sets the piece to a new position in the board."""
-        self.position = new_position
-        self.column = new_position[0]
-        self.row = new_position[1]
-        
     def pawn_capture_movements(self):
         """Return a list with a pawn capture movements allowed."""
-        capture_movements = []
-        
-        if self.color == "w":
-            r_col = get_radjacent_col(self.column)
-            l_col = get_ladjacent_col(self.column) 
-            up_row = get_upadjacent_row(self.row)
-            if r_col and up_row:
-                capture_movements.append(r_col + up_row) 
-            if l_col and up_row:
-                capture_movements.append(l_col + up_row)    
-            return capture_movements
-            
-        elif self.color == "b":
-            r_col = get_radjacent_col(self.column)
-            l_col = get_ladjacent_col(self.column) 
-            lo_row = get_loadjacent_row(self.row)
-            if r_col and lo_row:
-                capture_movements.append(r_col + lo_row)    
-            if l_col and lo_row:
-                capture_movements.append(l_col + lo_row)
-            return capture_movements
+        return list(PAWN_CAPTURES[self.color][self.position])
     
     def allow_movements(self, pieces):
         """Return a list with the allowed movements for the piece in the board."""
@@ -791,11 +1276,11 @@ class Pawn(Piece):
             piece = seek_piece(move, pieces)
             if piece:
                 movements.remove(move)
-        if self.row == "2":
+        if self.color == "w" and self.row == "2":
             piece = seek_piece(self.column + get_upadjacent_row(self.row), pieces)
             if piece:
                 movements = []
-        if self.row == "7":
+        if self.color == "b" and self.row == "7":
             piece = seek_piece(self.column + get_loadjacent_row(self.row), pieces)
             if piece:
                 movements = []
@@ -814,9 +1299,7 @@ class Pawn(Piece):
             if piece:
                 print("A piece has been captured!", end="\n\n")
                 pieces.remove(piece)
-            self.position = position
-            self.column = position[0]
-            self.row = position[1]
+            self.set_position(position)
             if self.color == "w":
                 if self.row == "8":
                     self.promote(pieces)
@@ -849,4 +1332,454 @@ class Pawn(Piece):
                 elif piece == "Q":
                     create("Q", self.color, self.position, pieces)
             else:
-                print("Please, introduce a valid name.", end="\n\n")
\ No newline at end of file
+                print("Please, introduce a valid name.", end="\n\n")
+
+
+class BitboardPosition:
+    """Class for a chess position represented by bitboards.
+    
+    The position keeps a bitboard for each piece kind of each side, the 
+    occupancy of each side, the piece in each square, the side to move 
+    (0 for white, 1 for black), the castling rights, the en passant square, 
+    the move counters and the Zobrist key, which is updated with each piece put 
+    in or removed from a square and with each move. The key of the pawns alone, 
+    and the middlegame score, the endgame score and the game phase of the 
+    pieces are updated in the same way.
+    """
+    def __init__(self):
+        """Construction of an empty position instance."""
+        self.bitboards = [0] * 12
+        self.occupancy = [0, 0]
+        self.squares = [None] * 64
+        self.side = 0
+        self.castling = 0
+        self.en_passant = None
+        self.halfmove = 0
+        self.fullmove = 1
+        self.key = self.pawn_key = 0
+        self.midgame = self.endgame = self.phase = 0
+        
+    def __repr__(self):
+        """Representation of a position instance."""
+        return f"BitboardPosition('{self.color}', {len(iterate_squares(self.occupancy[0] | self.occupancy[1]))} pieces)"
+        
+    @property
+    def color(self):
+        """Return the color of the side to move."""
+        return COLORS[self.side]
+    
+    @classmethod
+    def from_pieces(cls, pieces, color):
+        """Create a position from a list of pieces, with the side of a given color to move."""
+        position = cls()
+        for piece in pieces:
+            position.put((piece.color == "b") * 6 + piece.kind, piece.square)
+        position.side = COLORS.index(color)
+        position.castling = get_castling_rights(pieces)
+        position.key ^= position.get_state_key()
+        return position
+    
+    @classmethod
+    def from_fen(cls, fen):
+        """Create a position from its Forsyth-Edwards Notation (FEN)."""
+        fields = fen.split() + ["-", "-", "0", "1"][len(fen.split()) - 2:]
+        position = cls()
+        for i, fen_row in enumerate(fields[0].split("/")):
+            column = 0
+            for char in fen_row:
+                if char.isdigit():
+                    column += int(char)
+                else:
+                    side = 0 if char.isupper() else 1
+                    position.put(side * 6 + PIECE_NAMES.index(char.upper()), (7 - i) * 8 + column)
+                    column += 1
+        position.side = COLORS.index(fields[1])
+        for char, right in zip("KQkq", (WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE)):
+            if char in fields[2]:
+                position.castling |= right
+        position.en_passant = None if fields[3] == "-" else SQUARE_INDEX[fields[3]]
+        position.halfmove, position.fullmove = int(fields[4]), int(fields[5])
+        position.key ^= position.get_state_key()
+        return position
+    
+    def to_fen(self):
+        """Return the Forsyth-Edwards Notation (FEN) of the position."""
+        fen_rows = []
+        for row in range(7, -1, -1):
+            fen_row, empty = "", 0
+            for piece in self.squares[row * 8:row * 8 + 8]:
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    fen_row, empty = fen_row + str(empty), 0
+                name = PIECE_NAMES[piece % 6]
+                fen_row += name if piece < 6 else name.lower()
+            fen_rows.append(fen_row + str(empty) if empty else fen_row)
+        castling = "".join(char for char, right in zip("KQkq", (WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE)) 
+                           if self.castling & right) or "-"
+        en_passant = "-" if self.en_passant is None else SQUARES[self.en_passant]
+        return f"{'/'.join(fen_rows)} {self.color} {castling} {en_passant} {self.halfmove} {self.fullmove}"
+    
+    def to_pieces(self):
+        """Return a board with the pieces of the position."""
+        pieces = Board()
+        for square, piece in enumerate(self.squares):
+            if piece is not None:
+                create(PIECE_NAMES[piece % 6], COLORS[piece // 6], SQUARES[square], pieces)
+        for piece in pieces:
+            if piece.name in "KR":
+                piece.castling = False
+        for right, king_from, _, rook_from, _, _, _ in CASTLINGS:
+            if self.castling & right:
+                seek_piece(SQUARES[king_from], pieces).castling = True
+                seek_piece(SQUARES[rook_from], pieces).castling = True
+        return pieces
+    
+    def copy(self):
+        """Return a copy of the position."""
+        position = BitboardPosition()
+        position.bitboards = self.bitboards[:]
+        position.occupancy = self.occupancy[:]
+        position.squares = self.squares[:]
+        position.side = self.side
+        position.castling = self.castling
+        position.en_passant = self.en_passant
+        position.halfmove = self.halfmove
+        position.fullmove = self.fullmove
+        position.key, position.pawn_key = self.key, self.pawn_key
+        position.midgame, position.endgame, position.phase = self.midgame, self.endgame, self.phase
+        return position
+    
+    def get_state_key(self):
+        """Return the part of the Zobrist key given by the side to move, the castling rights and the en passant column."""
+        key = ZOBRIST_CASTLING[self.castling]
+        if self.side:
+            key ^= ZOBRIST_SIDE
+        en_passant = self.en_passant
+        if en_passant is not None and PAWN_ATTACKS[self.side ^ 1][en_passant] & self.bitboards[self.side * 6 + PAWN]:
+            key ^= ZOBRIST_EN_PASSANT[en_passant & 7]
+        return key
+    
+    def get_key(self):
+        """Return the Zobrist key of the position computed from scratch, to check the updated one."""
+        key = self.get_state_key()
+        for square, piece in enumerate(self.squares):
+            if piece is not None:
+                key ^= ZOBRIST_PIECES[piece][square]
+        return key
+    
+    def get_scores(self):
+        """Return the middlegame score, the endgame score and the game phase computed from all the pieces, to check the updated ones."""
+        midgame = endgame = phase = 0
+        for square, piece in enumerate(self.squares):
+            if piece is not None:
+                midgame += MIDGAME_VALUES[piece][square]
+                endgame += ENDGAME_VALUES[piece][square]
+                phase += PHASE_VALUES[piece % 6]
+        return midgame, endgame, phase
+    
+    def put(self, piece, square):
+        """Put a piece in an empty square."""
+        bit = 1 << square
+        self.bitboards[piece] |= bit
+        self.occupancy[piece // 6] |= bit
+        self.squares[square] = piece
+        self.key ^= ZOBRIST_PIECES[piece][square]
+        self.pawn_key ^= PAWN_KEYS[piece][square]
+        self.midgame += MIDGAME_VALUES[piece][square]
+        self.endgame += ENDGAME_VALUES[piece][square]
+        self.phase += PHASE_VALUES[piece % 6]
+        
+    def remove(self, square):
+        """Remove the piece in a square and return it."""
+        piece = self.squares[square]
+        bit = 1 << square
+        self.bitboards[piece] ^= bit
+        self.occupancy[piece // 6] ^= bit
+        self.squares[square] = None
+        self.key ^= ZOBRIST_PIECES[piece][square]
+        self.pawn_key ^= PAWN_KEYS[piece][square]
+        self.midgame -= MIDGAME_VALUES[piece][square]
+        self.endgame -= ENDGAME_VALUES[piece][square]
+        self.phase -= PHASE_VALUES[piece % 6]
+        return piece
+    
+    def king_square(self, side):
+        """Return the square of the king of a given side."""
+        return self.bitboards[side * 6 + KING].bit_length() - 1
+    
+    def is_attacked(self, square, by_side, occupied=None):
+        """Return 'True' if a square is attacked by any piece of a given side. Otherwise return 'False'.
+        
+        The sliding pieces' attacks are blocked by the 'occupied' bitboard, by 
+        default the pieces in the position.
+        """
+        bitboards = self.bitboards
+        offset = by_side * 6
+        if occupied is None:
+            occupied = self.occupancy[0] | self.occupancy[1]
+        if PAWN_ATTACKS[1 - by_side][square] & bitboards[offset + PAWN]:
+            return True
+        if KNIGHT_ATTACKS[square] & bitboards[offset + KNIGHT]:
+            return True
+        if KING_ATTACKS[square] & bitboards[offset + KING]:
+            return True
+        queens = bitboards[offset + QUEEN]
+        if sliding_attacks(square, occupied, BISHOP_LINES) & (bitboards[offset + BISHOP] | queens):
+            return True
+        if sliding_attacks(square, occupied, ROOK_LINES) & (bitboards[offset + ROOK] | queens):
+            return True
+        return False
+    
+    def attackers(self, square, by_side, occupied):
+        """Return the bitboard of the pieces of a given side which attack a square."""
+        bitboards = self.bitboards
+        offset = by_side * 6
+        queens = bitboards[offset + QUEEN]
+        return (PAWN_ATTACKS[1 - by_side][square] & bitboards[offset + PAWN] | 
+                KNIGHT_ATTACKS[square] & bitboards[offset + KNIGHT] | 
+                KING_ATTACKS[square] & bitboards[offset + KING] | 
+                sliding_attacks(square, occupied, BISHOP_LINES) & (bitboards[offset + BISHOP] | queens) | 
+                sliding_attacks(square, occupied, ROOK_LINES) & (bitboards[offset + ROOK] | queens))
+    
+    def pinned_pieces(self, king, side, occupied):
+        """Return the pieces of a side pinned to its king in a given square.
+        
+        The result is a dictionary which maps the square of each pinned piece to 
+        the bitboard of the squares it can move to: the squares between the 
+        king and the pinning piece, including it.
+        """
+        pins = {}
+        bitboards = self.bitboards
+        offset = (1 - side) * 6
+        own = self.occupancy[side]
+        queens = bitboards[offset + QUEEN]
+        for direction in QUEEN_LINES:
+            sliders = bitboards[offset + (ROOK if direction in ROOK_LINES else BISHOP)] | queens
+            ray = RAY_ATTACKS[direction][king]
+            if not ray & sliders:
+                continue
+            blockers = ray & occupied
+            if POSITIVE_DIRECTIONS[direction]:
+                first = (blockers & -blockers).bit_length() - 1
+                blockers ^= 1 << first
+                second = (blockers & -blockers).bit_length() - 1
+            else:
+                first = blockers.bit_length() - 1
+                blockers ^= 1 << first
+                second = blockers.bit_length() - 1
+            if own >> first & 1 and second >= 0 and sliders >> second & 1:
+                pins[first] = BETWEEN[king][second] | 1 << second
+        return pins
+    
+    def in_check(self):
+        """Return 'True' if the king of the side to move is in check. Otherwise return 'False'."""
+        return self.is_attacked(self.king_square(self.side), 1 - self.side)
+    
+    def pseudo_legal_moves(self):
+        """Return a list with the moves of the side to move, without checking if they leave its king in check."""
+        moves = []
+        side = self.side
+        offset = side * 6
+        bitboards = self.bitboards
+        own = self.occupancy[side]
+        enemy = self.occupancy[1 - side]
+        occupied = own | enemy
+        empty = ~occupied & FULL_BOARD
+        
+        pawns = bitboards[offset + PAWN]
+        if side == 0:
+            single_pushes = (pawns << 8) & empty
+            double_pushes = ((single_pushes & RANK_3) << 8) & empty
+            push = 8
+        else:
+            single_pushes = (pawns >> 8) & empty
+            double_pushes = ((single_pushes & RANK_6) >> 8) & empty
+            push = -8
+        for to_square in iterate_squares(single_pushes):
+            add_pawn_moves(moves, to_square - push, to_square)
+        for to_square in iterate_squares(double_pushes):
+            moves.append((to_square - 2 * push) | to_square << 6)
+        targets = enemy if self.en_passant is None else enemy | 1 << self.en_passant
+        for from_square in iterate_squares(pawns):
+            for to_square in iterate_squares(PAWN_ATTACKS[side][from_square] & targets):
+                add_pawn_moves(moves, from_square, to_square)
+                
+        for kind in (KNIGHT, BISHOP, ROOK, QUEEN, KING):
+            for from_square in iterate_squares(bitboards[offset + kind]):
+                for to_square in iterate_squares(piece_attacks(kind, from_square, occupied) & ~own):
+                    moves.append(from_square | to_square << 6)
+                    
+        for right, king_from, king_to, _, _, empty_squares, safe_squares in CASTLINGS[2 * side:2 * side + 2]:
+            if self.castling & right and not occupied & empty_squares:
+                if not any(self.is_attacked(square, 1 - side) for square in safe_squares):
+                    moves.append(king_from | king_to << 6)
+                    
+        return moves
+    
+    def legal_moves(self, captures=False):
+        """Return a list with the legal moves of the side to move.
+        
+        The pieces giving check and the pinned pieces are found once from the 
+        king's square. Under double check only the king can move; under check 
+        the other pieces can only capture the checking piece or block its way; 
+        and a pinned piece can only move along the line of its pin. Only the 
+        en passant captures, which may uncover a check in the row, are tried in 
+        the position. With 'captures', only the captures and the promotions are 
+        returned.
+        """
+        moves = []
+        side, enemy_side = self.side, 1 - self.side
+        offset = side * 6
+        bitboards = self.bitboards
+        own = self.occupancy[side]
+        enemy = self.occupancy[enemy_side]
+        occupied = own | enemy
+        king = self.king_square(side)
+        checkers = self.attackers(king, enemy_side, occupied)
+        destinations = enemy if captures else ~own & FULL_BOARD
+        
+        without_king = occupied ^ 1 << king
+        for to_square in iterate_squares(KING_ATTACKS[king] & destinations):
+            if not self.is_attacked(to_square, enemy_side, without_king):
+                moves.append(king | to_square << 6)
+        if checkers & (checkers - 1):
+            return moves
+        if checkers:
+            targets = BETWEEN[king][checkers.bit_length() - 1] | checkers
+        else:
+            targets = FULL_BOARD
+            for right, king_from, king_to, _, _, empty_squares, safe_squares in CASTLINGS[2 * side:2 * side + 2]:
+                if self.castling & right and not occupied & empty_squares and not captures:
+                    if not any(self.is_attacked(square, enemy_side) for square in safe_squares):
+                        moves.append(king_from | king_to << 6)
+        pins = self.pinned_pieces(king, side, occupied)
+        
+        pawns = bitboards[offset + PAWN]
+        empty = ~occupied & FULL_BOARD
+        if side == 0:
+            single_pushes = (pawns << 8) & empty
+            double_pushes = ((single_pushes & RANK_3) << 8) & empty
+            push = 8
+        else:
+            single_pushes = (pawns >> 8) & empty
+            double_pushes = ((single_pushes & RANK_6) >> 8) & empty
+            push = -8
+        if captures:
+            single_pushes &= RANK_1 | RANK_8
+            double_pushes = 0
+        for to_square in iterate_squares(single_pushes & targets):
+            from_square = to_square - push
+            if from_square not in pins or pins[from_square] >> to_square & 1:
+                add_pawn_moves(moves, from_square, to_square)
+        for to_square in iterate_squares(double_pushes & targets):
+            from_square = to_square - 2 * push
+            if from_square not in pins or pins[from_square] >> to_square & 1:
+                moves.append(from_square | to_square << 6)
+        for from_square in iterate_squares(pawns):
+            attacks = PAWN_ATTACKS[side][from_square]
+            mask = targets & pins.get(from_square, FULL_BOARD)
+            for to_square in iterate_squares(attacks & enemy & mask):
+                add_pawn_moves(moves, from_square, to_square)
+            if self.en_passant is not None and attacks >> self.en_passant & 1:
+                move = from_square | self.en_passant << 6
+                undo = self.make_move(move)
+                if not self.is_attacked(king, enemy_side):
+                    moves.append(move)
+                self.unmake_move(undo)
+                
+        for kind in (KNIGHT, BISHOP, ROOK, QUEEN):
+            for from_square in iterate_squares(bitboards[offset + kind]):
+                mask = destinations & targets & pins.get(from_square, FULL_BOARD)
+                for to_square in iterate_squares(piece_attacks(kind, from_square, occupied) & mask):
+                    moves.append(from_square | to_square << 6)
+                    
+        return moves
+    
+    def make_move(self, move):
+        """Make a move in the position and return the record needed to unmake it."""
+        from_square, to_square, promotion = move & 63, move >> 6 & 63, move >> 12
+        undo = (move, self.castling, self.en_passant, self.halfmove, self.key)
+        self.key ^= self.get_state_key()
+        piece = self.remove(from_square)
+        kind = piece % 6
+        captured = captured_square = None
+        self.halfmove += 1
+        if self.squares[to_square] is not None:
+            captured, captured_square = self.remove(to_square), to_square
+            self.halfmove = 0
+        if kind == PAWN:
+            self.halfmove = 0
+            if to_square == self.en_passant:
+                captured_square = to_square - 8 if self.side == 0 else to_square + 8
+                captured = self.remove(captured_square)
+            if promotion:
+                piece = piece - PAWN + promotion
+        elif kind == KING and abs(to_square - from_square) == 2:
+            for _, _, king_to, rook_from, rook_to, _, _ in CASTLINGS:
+                if king_to == to_square:
+                    self.put(self.remove(rook_from), rook_to)
+        self.put(piece, to_square)
+        
+        self.castling &= CASTLING_RIGHTS_MASK[from_square] & CASTLING_RIGHTS_MASK[to_square]
+        if kind == PAWN and abs(to_square - from_square) == 16:
+            self.en_passant = (from_square + to_square) // 2
+        else:
+            self.en_passant = None
+        if self.side == 1:
+            self.fullmove += 1
+        self.side ^= 1
+        self.key ^= self.get_state_key()
+        return undo + (captured, captured_square)
+    
+    def unmake_move(self, undo):
+        """Unmake a move in the position from the record returned by 'make_move'."""
+        move, self.castling, self.en_passant, self.halfmove, key, captured, captured_square = undo
+        from_square, to_square, promotion = move & 63, move >> 6 & 63, move >> 12
+        self.side ^= 1
+        if self.side == 1:
+            self.fullmove -= 1
+        piece = self.remove(to_square)
+        if promotion:
+            piece = piece - promotion + PAWN
+        elif piece % 6 == KING and abs(to_square - from_square) == 2:
+            for _, _, king_to, rook_from, rook_to, _, _ in CASTLINGS:
+                if king_to == to_square:
+                    self.put(self.remove(rook_to), rook_from)
+        self.put(piece, from_square)
+        if captured is not None:
+            self.put(captured, captured_square)
+        self.key = key
+        
+    def make_null_move(self):
+        """Pass the turn to the other side and return the record needed to unmake it.
+        
+        The en passant square is lost, and the halfmove counter starts again, 
+        so no repetition is found through the null move.
+        """
+        undo = (self.en_passant, self.halfmove, self.key)
+        self.key ^= self.get_state_key()
+        self.en_passant = None
+        self.halfmove = 0
+        self.side ^= 1
+        self.key ^= self.get_state_key()
+        return undo
+    
+    def unmake_null_move(self, undo):
+        """Unmake a null move from the record returned by 'make_null_move'."""
+        self.en_passant, self.halfmove, self.key = undo
+        self.side ^= 1
+        
+    def to_movement(self, move):
+        """Return a move as a tuple with the piece's name, its position and its new position."""
+        from_square, to_square = move & 63, move >> 6 & 63
+        return (PIECE_NAMES[self.squares[from_square] % 6], SQUARES[from_square], SQUARES[to_square])
+    
+    def from_movement(self, movement, promotion="Q"):
+        """Return the move of a tuple with the piece's name, its position and its new position."""
+        from_square, to_square = SQUARE_INDEX[movement[1]], SQUARE_INDEX[movement[2]]
+        move = from_square | to_square << 6
+        if movement[0] == "P" and (to_square >= 56 or to_square < 8):
+            move |= PIECE_NAMES.index(promotion) << 12
+        return move